@@ -0,0 +1,194 @@
+"""
+Benchmark the interpreter on the graded programs in bench/corpus and
+compare against a stored baseline.
+
+    python bench/run.py [--repeat N] [--threshold F] [--only TEXT]
+                        [--output FILE] [--baseline FILE] [--update-baseline]
+
+Each program runs --repeat times, every time in a fresh process so caches
+and Number.unknownCount start cold. Recorded per program, as medians:
+lex, parse, interpret and solve seconds (solve is the part of interpret
+spent in SolverBranch.settle), peak RSS growth over the loaded
+interpreter in MB, and the final branch count.
+
+Results go to --output as JSON. Against the baseline, a time or memory
+figure over (1 + threshold) times its baseline value is a regression, as
+is any change in branch count or status. The exit status is 1 if there
+are regressions.
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CORPUS = os.path.join(ROOT, 'bench', 'corpus')
+BASELINE = os.path.join(ROOT, 'bench', 'baseline.json')
+RESULTS = os.path.join(ROOT, 'bench', 'results.json')
+GRADES = ('easy', 'medium', 'hard')
+# Metrics compared against the baseline, with the change below which a
+# difference counts as noise whatever the ratio
+MEASURED = {'lex_s': 0.005, 'parse_s': 0.005, 'interpret_s': 0.05, 'solve_s': 0.05, 'peak_mb': 2.0}
+
+
+def measure(path):
+    """Run one program in this process and return its metrics, see --measure"""
+    import io
+    import resource
+    import time
+    from contextlib import redirect_stdout
+
+    sys.path.insert(0, ROOT)
+    from src.eukleia import Eukleia
+    from src.lexer import Lexer
+    from src.parser import Parser
+    from src.solver import SolverBranch
+
+    with open(path) as f:
+        code = f.read()
+    program = Eukleia()
+    program.interpreter
+
+    start = time.perf_counter()
+    tokens = Lexer().generate_tokens(code)
+    lexed = time.perf_counter()
+    nodes = Parser().parseTokens(tokens)
+    parsed = time.perf_counter()
+
+    solving = [0.0]
+    settle = SolverBranch.settle
+
+    def timed_settle(self, *args, **kwargs):
+        begin = time.perf_counter()
+        try:
+            return settle(self, *args, **kwargs)
+        finally:
+            solving[0] += time.perf_counter() - begin
+    SolverBranch.settle = timed_settle
+
+    loaded_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    status = 'ok'
+    begin = time.perf_counter()
+    try:
+        with redirect_stdout(io.StringIO()):
+            program.interpreter.run(nodes)
+    except Exception as e:
+        status = f'{type(e).__name__}: {e}'.strip()
+    interpreted = time.perf_counter()
+    # ru_maxrss is in KB on Linux
+    peak_mb = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - loaded_rss) / 1024
+
+    return {
+        'lex_s': lexed - start,
+        'parse_s': parsed - lexed,
+        'interpret_s': interpreted - begin,
+        'solve_s': solving[0],
+        'peak_mb': peak_mb,
+        'branches': len(program.solver.branches),
+        'status': status,
+    }
+
+
+def run_program(path, repeat):
+    runs = []
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, __file__, '--measure', path],
+            cwd=ROOT, capture_output=True, text=True, env={**os.environ, 'PYTHONHASHSEED': '0'},
+        )
+        if result.returncode != 0:
+            return {'status': f'crashed: {result.stderr.strip().splitlines()[-1] if result.stderr.strip() else result.returncode}'}
+        runs.append(json.loads(result.stdout.strip().splitlines()[-1]))
+    summary = {metric: round(statistics.median(run[metric] for run in runs), 6) for metric in MEASURED}
+    summary['branches'] = runs[0]['branches']
+    statuses = {run['status'] for run in runs}
+    summary['status'] = runs[0]['status'] if len(statuses) == 1 else 'unstable: ' + ' | '.join(sorted(statuses))
+    return summary
+
+
+def grade(name):
+    prefix = name.split('_', 1)[0]
+    return GRADES.index(prefix) if prefix in GRADES else len(GRADES)
+
+
+def compare(results, baseline, threshold):
+    """Lines describing every regression of results against baseline"""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        for key in ('status', 'branches'):
+            if result.get(key) != base.get(key):
+                regressions.append(f'{name}: {key} {base.get(key)} -> {result.get(key)}')
+        for metric, noise in MEASURED.items():
+            new, old = result.get(metric), base.get(metric)
+            if new is None or old is None:
+                continue
+            if new > old * (1 + threshold) and new - old > noise:
+                regressions.append(f'{name}: {metric} {old:.4g} -> {new:.4g} (+{(new / old - 1) * 100 if old else float("inf"):.0f}%)')
+    return regressions
+
+
+def main():
+    args = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    args.add_argument('--repeat', type=int, default=3, help="fresh runs per program, medians are reported")
+    args.add_argument('--threshold', type=float, default=0.25, help="allowed slowdown as a fraction of the baseline")
+    args.add_argument('--only', default='', help="run only programs whose name contains this")
+    args.add_argument('--output', default=RESULTS, help="where to write the results")
+    args.add_argument('--baseline', default=BASELINE, help="results to compare against")
+    args.add_argument('--update-baseline', action='store_true', help="store these results as the new baseline")
+    args.add_argument('--measure', help=argparse.SUPPRESS)
+    args = args.parse_args()
+
+    if args.measure:
+        print(json.dumps(measure(args.measure)))
+        return
+
+    paths = sorted(glob.glob(os.path.join(CORPUS, '*.ekl')), key=lambda path: (grade(os.path.basename(path)), path))
+    paths = [path for path in paths if args.only in os.path.splitext(os.path.basename(path))[0]]
+    results = {}
+    print(f"{'program':<22}{'lex ms':>8}{'parse ms':>10}{'interp s':>10}{'solve s':>9}{'peak MB':>9}{'branches':>10}  status")
+    for path in paths:
+        name = os.path.splitext(os.path.basename(path))[0]
+        result = results[name] = run_program(path, args.repeat)
+        if 'lex_s' not in result:
+            print(f"{name:<22}{result['status']}")
+            continue
+        print(f"{name:<22}{result['lex_s'] * 1000:>8.2f}{result['parse_s'] * 1000:>10.2f}{result['interpret_s']:>10.3f}"
+              f"{result['solve_s']:>9.3f}{result['peak_mb']:>9.1f}{result['branches']:>10}  {result['status']}")
+
+    import sympy
+    report = {
+        'python': platform.python_version(),
+        'sympy': sympy.__version__,
+        'machine': platform.machine(),
+        'programs': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline updated: {os.path.relpath(args.baseline, ROOT)}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare against, store one with --update-baseline")
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline['programs'], args.threshold)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    print(f"{len(regressions)} regressions against {os.path.relpath(args.baseline, ROOT)} (threshold {args.threshold:.0%})")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
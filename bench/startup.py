@@ -0,0 +1,67 @@
+"""
+Import time of the interpreter's entry points, each measured in a fresh
+Python process. Exits with status 1 if a median goes over its target or
+a front end entry point loads a module it should leave to the backend.
+
+    python bench/startup.py [--repeat N] [--scale X]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# name, statement, target in ms (None only reports), modules it must not load
+SCENARIOS = [
+    ('lexer', 'from src.lexer import Lexer', 50, ('sympy', 'numpy')),
+    ('parser', 'from src.parser import Parser', 50, ('sympy', 'numpy')),
+    ('eukleia', 'from src.eukleia import Eukleia; Eukleia().parse("A = (0, 0)\\n")', 100, ('sympy', 'numpy')),
+    ('server', 'import src.server', 150, ('sympy', 'numpy')),
+    ('backend', 'from src.eukleia import Eukleia; Eukleia().run("A = (0, 0)\\n")', None, ()),
+]
+PROBE = """
+import io, sys, time, contextlib
+start = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    {statement}
+elapsed = time.perf_counter() - start
+print(elapsed, ' '.join(m for m in {forbidden!r} if m in sys.modules))
+"""
+
+
+def measure(statement, forbidden):
+    """Seconds statement took to run in a fresh process, and the forbidden modules it loaded"""
+    result = subprocess.run(
+        [sys.executable, '-c', PROBE.format(statement=statement, forbidden=forbidden)],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    elapsed, *loaded = result.stdout.split()
+    return float(elapsed), loaded
+
+
+def main():
+    args = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    args.add_argument('--repeat', type=int, default=5, help="fresh processes per entry point")
+    args.add_argument('--scale', type=float, default=1.0, help="multiply every target, for slow machines")
+    args = args.parse_args()
+
+    failed = False
+    print(f"{'entry point':<12}{'median ms':>10}{'target ms':>11}  status")
+    for name, statement, target, forbidden in SCENARIOS:
+        runs = [measure(statement, forbidden) for _ in range(args.repeat)]
+        median = statistics.median(elapsed for elapsed, _ in runs) * 1000
+        loaded = sorted(set().union(*[loaded for _, loaded in runs]))
+        status = 'ok'
+        if loaded:
+            status = f"loaded {', '.join(loaded)}"
+        elif target is not None and median > target * args.scale:
+            status = 'too slow'
+        failed |= status != 'ok'
+        shown = '-' if target is None else f'{target * args.scale:g}'
+        print(f"{name:<12}{median:>10.1f}{shown:>11}  {status}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,27 +1,65 @@
 # main.py
+import argparse
 import sys
+from contextlib import nullcontext
 from src.eukleia import Eukleia
+from src.server import Server, repl
+from src.batch import run_batch
+from src.profiler import profiling
 
 def main():
+    args = argparse.ArgumentParser(description="Run a Eukleia program")
+    args.add_argument('filename', nargs='?', help="the .ekl file to run, - reads stdin, none starts a REPL")
+    args.add_argument('--rebuild', action='store_true', help="reparse the file and overwrite its cached .eklc")
+    args.add_argument('--no-cache', dest='cache', action='store_false', help="neither read nor write a .eklc")
+    args.add_argument('--checkpoint', action='store_true', help="save the solver after each statement and resume from the first changed one")
+    args.add_argument('--batch', nargs='+', metavar='PATH', help="run every .ekl file in these directories, globs or files")
+    args.add_argument('--jobs', type=int, help="worker processes for --batch, defaults to one per CPU")
+    args.add_argument('--timeout', type=float, help="seconds each --batch file may take")
+    args.add_argument('--report', help="file for the --batch JSON-lines report, defaults to stdout")
+    args.add_argument('--profile', action='store_true', help="print per statement timings and counters to stderr")
+    args.add_argument('--trace', help="write a Chrome trace-event JSON of the run to this file")
+    args.add_argument('--serve', action='store_true', help="answer JSON-lines requests on stdin")
+    args.add_argument('--port', type=int, help="answer JSON-lines requests on this local TCP port")
+    args.add_argument('--solve-cache', metavar='PATH', help="keep exact solutions in this sqlite file and reuse them across runs")
+    args = args.parse_args()
 
-    # if len(sys.argv) < 2:
-    #     print("Usage: python main.py filename.ekl")
-    #     sys.exit(1)
-        
-    # filename = sys.argv[1]
-    filename = "test2.ekl"
-    
-    try:
-        with open(filename, 'r') as f:
-            code = f.read()
-    except FileNotFoundError:
-        print(f'File not found: {filename}')
-        sys.exit(1)
-    
+    solver_options = {}
+    if args.solve_cache:
+        from src.solveCache import SolveCache
+        solver_options['cache'] = SolveCache(args.solve_cache)
+
+    if args.batch:
+        report = open(args.report, 'w') if args.report else sys.stdout
+        with report:
+            results = run_batch(args.batch, report, jobs=args.jobs, timeout=args.timeout, solver_options=solver_options)
+        sys.exit(any(result['status'] != 'ok' for result in results))
+    if args.port is not None:
+        Server(**solver_options).serve_socket(port=args.port)
+        return
+    if args.serve:
+        Server(**solver_options).serve_stream()
+        return
+    if args.filename is None:
+        repl(**solver_options)
+        return
 
-    program = Eukleia()
-    program.run(code, False)
+    program = Eukleia(**solver_options)
+    with profiling() if args.profile or args.trace else nullcontext() as profile:
+        try:
+            if args.filename == '-':
+                program.run(sys.stdin, False)
+            else:
+                program.run_file(args.filename, rebuild=args.rebuild, cache=args.cache, checkpoint=args.checkpoint)
+        except FileNotFoundError:
+            print(f'File not found: {args.filename}')
+            sys.exit(1)
+        finally:
+            if args.profile:
+                print(profile.table(), file=sys.stderr)
+            if args.trace:
+                profile.write_trace(args.trace)
     
 
 if __name__ == "__main__":
-    main()   
\ No newline at end of file
+    main()   
@@ -1,4 +1,15 @@
-from .builtinFuncs import *
+class Builtin:
+    """
+    Class attribute standing for a function in builtinFuncs, looked up on
+    first use so that parsing never imports the geometry and SymPy behind it
+    """
+    def __init__(self, name):
+        self.name = name
+
+    def __get__(self, node, owner=None):
+        from . import builtinFuncs
+        return getattr(builtinFuncs, self.name)
+
 
 class ASTNode:
     def __init__(self, *args):
@@ -6,7 +17,7 @@ class ASTNode:
 
 # Expressions
 class NumberNode(ASTNode):
-    func = make_number
+    func = Builtin('make_number')
     def __init__(self, value):
         self.value = value
     def __repr__(self):
@@ -38,11 +49,11 @@ class ObjectNode(ASTNode):
         return f"{type(self).__name__}({', '.join(map(str, self.args))})"
     
 class PointNode(ObjectNode):
-    func = make_point
+    func = Builtin('make_point')
     pass
 
 class LineNode(ObjectNode):
-    func = make_line
+    func = Builtin('make_line')
 
     def __str__(self):
         label = ""
@@ -52,11 +63,11 @@ class LineNode(ObjectNode):
 
 
 class CircleNode(ObjectNode):
-    func = make_circle
+    func = Builtin('make_circle')
     pass
 
 class AngleNode(ObjectNode):
-    func = make_angle
+    func = Builtin('make_angle')
     
     def __str__(self):
         label = "<"
@@ -126,3 +137,6 @@ class PrintNode(ASTNode):
     # func = printout
     def __init__(self, *args):
         self.args = args
+
+    def __repr__(self):
+        return f"{type(self).__name__}({', '.join(map(str, self.args))})"
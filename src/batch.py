@@ -0,0 +1,98 @@
+import glob
+import io
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stdout
+
+# Colour codes the interpreter prints, stripped from the report
+ANSI = re.compile(r'\033\[[0-9;]*m')
+
+
+# Its own type so the solver's handling of SolveTimeout never swallows it
+class JobTimeout(BaseException):
+    pass
+
+
+def collect(patterns):
+    """The .ekl files named by patterns, each a file, a directory searched recursively or a glob"""
+    files = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            found = glob.glob(os.path.join(pattern, '**', '*.ekl'), recursive=True)
+        elif os.path.isfile(pattern):
+            found = [pattern]
+        else:
+            found = glob.glob(pattern, recursive=True)
+        files.extend(sorted(found))
+    # A file matched by several patterns runs once
+    return list(dict.fromkeys(files))
+
+
+def run_job(path, timeout=None, solver_options=None):
+    """
+    Worker process side of run_batch: run one file in a fresh Eukleia with
+    unknowns numbered from ?0 again, and describe how it went. The parse
+    cache is off so jobs never write into the input directories or race
+    each other over the same cache file.
+    """
+    from .budget import time_limit
+    from .eukleia import Eukleia
+    from .geometry import Number
+
+    Number.unknownCount = 0
+    program = Eukleia(**(solver_options or {}))
+    result = {'file': path, 'status': 'ok'}
+    output = io.StringIO()
+    start = time.perf_counter()
+    try:
+        with redirect_stdout(output), time_limit(timeout, JobTimeout):
+            program.run_file(path, cache=False)
+    except JobTimeout:
+        result['status'] = 'timeout'
+        result['error'] = f'Timed out after {timeout:g}s'
+    except Exception as e:
+        result['status'] = 'error'
+        result['error'] = f'{type(e).__name__}: {e}'
+    finally:
+        program.solver.close()
+    result['seconds'] = round(time.perf_counter() - start, 6)
+    result['branches'] = len(program.solver.branches)
+    result['output'] = ANSI.sub('', output.getvalue())
+    return result
+
+
+def run_batch(patterns, report=sys.stdout, jobs=None, timeout=None, solver_options=None):
+    """
+    Run every file patterns name in a pool of jobs worker processes, writing
+    one JSON line per file to report as each finishes and a summary of the
+    failures to stderr at the end. Returns the results in completion order.
+    """
+    files = collect(patterns)
+    results = []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(run_job, path, timeout, solver_options): path for path in files}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                # The worker itself died, e.g. killed or out of memory
+                result = {'file': futures[future], 'status': 'error', 'error': f'{type(e).__name__}: {e}'}
+            results.append(result)
+            report.write(json.dumps(result) + '\n')
+            report.flush()
+
+    summarize(results, time.perf_counter() - start)
+    return results
+
+
+def summarize(results, seconds, out=sys.stderr):
+    failures = [result for result in results if result['status'] != 'ok']
+    counts = {status: sum(result['status'] == status for result in results) for status in ('ok', 'error', 'timeout')}
+    print(f"{len(results)} files in {seconds:.2f}s: " + ', '.join(f'{n} {status}' for status, n in counts.items()), file=out)
+    for result in sorted(failures, key=lambda result: result['file']):
+        print(f"  {result['status'].upper():<8}{result['file']}: {result['error'].strip()}", file=out)
@@ -0,0 +1,57 @@
+import signal
+import threading
+import time
+from contextlib import contextmanager
+
+POLICIES = ('error', 'beam', 'defer')
+
+
+class BudgetExceeded(Exception):
+    def __init__(self, limit, message):
+        super().__init__(f"{limit}: {message}")
+        self.limit = limit
+
+
+# Derives from BaseException so the blanket `except Exception` around sp.simplify
+# calls cannot swallow it, the same way KeyboardInterrupt gets through
+class SolveTimeout(BaseException):
+    pass
+
+
+@contextmanager
+def time_limit(seconds, error=SolveTimeout):
+    """
+    Raise error (SolveTimeout by default) in the running code once seconds have passed.
+    Relies on SIGALRM, so it only takes effect in the main thread on Unix.
+    Limits nest, an enclosing one keeps counting down inside this one.
+    """
+    if seconds is None or not hasattr(signal, 'setitimer') or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+    if seconds <= 0:
+        raise error()
+
+    outer = signal.getitimer(signal.ITIMER_REAL)[0]
+    previous = signal.getsignal(signal.SIGALRM)
+    # Whichever deadline comes first is armed, and if it is the enclosing
+    # limit's, its handler runs so the error raised is that limit's own
+    outer_first = bool(outer) and outer <= seconds
+    fired_outer = []
+
+    def expire(signum, frame):
+        if outer_first and callable(previous):
+            fired_outer.append(True)
+            previous(signum, frame)
+        raise error()
+
+    signal.signal(signal.SIGALRM, expire)
+    started = time.monotonic()
+    signal.setitimer(signal.ITIMER_REAL, outer if outer_first else seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+        if outer and not fired_outer:
+            # Hand the enclosing limit what is left of it, firing at once if spent
+            signal.setitimer(signal.ITIMER_REAL, max(outer - (time.monotonic() - started), 1e-6))
@@ -0,0 +1,106 @@
+import glob
+import hashlib
+import io
+import json
+import os
+import sqlite3
+from .astNodes import ASTNode
+from .programCache import interpreter_version
+from .snapshot import OPTIONS, restore_branches, snapshot
+
+
+def node_key(node):
+    """Stable text for a node, equal for equal statements however they were parsed"""
+    if isinstance(node, ASTNode):
+        fields = ', '.join(f'{name}={node_key(value)}' for name, value in sorted(vars(node).items()))
+        return f'{type(node).__name__}({fields})'
+    if isinstance(node, (list, tuple)):
+        return f'[{", ".join(map(node_key, node))}]'
+    return repr(node)
+
+
+class Tee(io.TextIOBase):
+    """Writes through to stream while keeping a copy of everything written"""
+    def __init__(self, stream):
+        self.stream = stream
+        self.copy = io.StringIO()
+
+    def write(self, text):
+        self.copy.write(text)
+        return self.stream.write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+
+class Checkpoints:
+    """
+    The solver's branches and printed output after every statement of one
+    program, in a sqlite file keyed by the hash of the statements so far.
+    On a rerun the statements up to the first changed one are replayed from
+    their stored output, the branches are restored from the last of them and
+    only the rest is executed. States are stored as snapshot() JSON.
+    """
+    def __init__(self, path, solver):
+        self.path = path
+        self.solver = solver
+        version = interpreter_version(sorted(map(os.path.basename, glob.glob(os.path.join(os.path.dirname(__file__), '*.py')))))
+        settings = repr([(name, getattr(solver, name)) for name in OPTIONS])
+        self.chain = hashlib.sha256(version + settings.encode())
+        # Keys of the statements run so far and the last one found stored
+        self.keys = []
+        self.resume_from = None
+        self.replayed = 0
+        self._connection = None
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._connection = sqlite3.connect(self.path)
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS checkpoints (key TEXT PRIMARY KEY, output TEXT, state TEXT)'
+            )
+        return self._connection
+
+    def advance(self, node):
+        """Key of the program up to and including node"""
+        self.chain.update(node_key(node).encode() + b'\n')
+        key = self.chain.hexdigest()
+        self.keys.append(key)
+        return key
+
+    def replay(self, key):
+        """The stored output of the statement ending at key, or None if it has to be run"""
+        row = self.connection.execute('SELECT output FROM checkpoints WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        self.resume_from = key
+        self.replayed += 1
+        return row[0]
+
+    def restore(self):
+        """Put the solver back in the state the last replayed statement left it in"""
+        if self.resume_from is None:
+            return
+        row = self.connection.execute('SELECT state FROM checkpoints WHERE key = ?', (self.resume_from,)).fetchone()
+        solver = self.solver
+        branches = restore_branches(json.loads(row[0]), solver.incremental, solver.numeric, solver.cache)
+        solver.branches = branches
+        solver.index = {branch.fingerprint() for branch in branches}
+        self.resume_from = None
+
+    def record(self, key, output):
+        state = json.dumps(snapshot(self.solver), separators=(',', ':'))
+        with self.connection:
+            self.connection.execute('INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?)', (key, output, state))
+
+    def finish(self):
+        """Drop the checkpoints of statements that are no longer in the program"""
+        keep = set(self.keys)
+        stale = [(key,) for key, in self.connection.execute('SELECT key FROM checkpoints') if key not in keep]
+        with self.connection:
+            self.connection.executemany('DELETE FROM checkpoints WHERE key = ?', stale)
+
+    def __repr__(self):
+        return f"Checkpoints({self.path}: {self.replayed} of {len(self.keys)} statements replayed)"
@@ -1,35 +1,73 @@
 from src.lexer import Lexer
 from src.parser import Parser
-from .interpreter import Interpreter
-from .solver import Solver
+from .programCache import ProgramCache, cache_path
 
 
 class Eukleia:
-    def __init__(self):
+    def __init__(self, **solver_options):
         self.lexer = Lexer()
         self.parser = Parser()
-        self.solver = Solver()
-        self.interpreter = Interpreter(self)
+        self.solver_options = solver_options
+        self._solver = None
+        self._interpreter = None
+        self.program_cache = ProgramCache()
+
+    # The solver backend pulls in SymPy, so it is only loaded once something
+    # is run, lexing and parsing alone never import it
+    @property
+    def solver(self):
+        if self._solver is None:
+            from .solver import Solver
+            self._solver = Solver(**self.solver_options)
+        return self._solver
+
+    @property
+    def interpreter(self):
+        if self._interpreter is None:
+            from .interpreter import Interpreter
+            self._interpreter = Interpreter(self)
+        return self._interpreter
 
     def run(self, code, spit=False):
-        self.tokens = self.lexer.generate_tokens(code)
-        
+        """
+        Run code, a string or a file object such as sys.stdin. Lexing, parsing
+        and interpreting are chained generators, so each statement is executed
+        and printed as soon as its line has been read.
+        """
         if spit:
+            self.tokens = self.lexer.generate_tokens(code)
             print("TOKENS:")
             print(self.tokens)
-        
-        self.astNodes = self.parser.parseTokens(self.tokens)
-        
-        if spit:
+            self.astNodes = list(self.parser.parseStream(self.tokens))
             print("NODES:")
             for node in self.astNodes:
                 print(node)
-        
-        self.interpreter.run(self.astNodes)
-
-        
-        
+            self.interpreter.run(self.astNodes)
+            return
 
+        tokens = self.lexer.iter_tokens(code)
+        self.interpreter.run(self.parser.parseStream(tokens))
 
+    def parse(self, code):
+        return list(self.parser.parseStream(self.lexer.iter_tokens(code)))
 
-        
\ No newline at end of file
+    def run_file(self, path, rebuild=False, cache=True, checkpoint=False):
+        """
+        Run the program at path, reusing the nodes stored in its .eklc file
+        when the source has not changed. rebuild forces a fresh parse that
+        replaces the stored nodes, cache=False neither reads nor writes them
+        and streams the file instead, running each statement as it is read.
+        checkpoint saves the solver after every statement in a .eklck file
+        and resumes from the last statement that has not changed.
+        """
+        with open(path, 'r') as f:
+            checkpoints = None
+            if checkpoint:
+                from .checkpoints import Checkpoints
+                checkpoints = Checkpoints(cache_path(path, '.eklck'), self.solver)
+            if not cache:
+                self.interpreter.run(self.parser.parseStream(self.lexer.iter_tokens(f)), checkpoints)
+                return
+            code = f.read()
+        nodes = self.program_cache.parse(path, code, self.parse, rebuild)
+        self.interpreter.run(nodes, checkpoints)
@@ -1,12 +1,48 @@
 from .helperFuncs import *
 import sympy as sp
+from . import profiler
 from uuid import uuid4
+import functools
+
+def cached(method):
+    """
+    Remember what a derived-quantity method returns on the instance. Geometry
+    objects are never changed in place, substitute() builds new ones when a
+    point moves, so a cached expression stays valid for the object's lifetime.
+    """
+    name = f'_{method.__name__}'
+    @functools.wraps(method)
+    def wrapper(self):
+        try:
+            return self.__dict__[name]
+        except KeyError:
+            value = self.__dict__[name] = method(self)
+            return value
+    return wrapper
+
+@functools.lru_cache(maxsize=4096)
+def simplified(expr):
+    """sp.simplify shared by every Number, so each distinct expression is simplified once"""
+    profiler.count('simplify_calls')
+    return sp.simplify(expr)
 
 class EklPrim:
     pass
 
 class Object(EklPrim):
-    pass
+    def substitute(self, solution, memo=None):
+        """
+        This object with solution applied, self if nothing in it changes.
+        memo maps the id() of objects already substituted to their result,
+        so an object shared by several others is only substituted once and
+        its replacement stays shared.
+        """
+        if memo is None:
+            memo = {}
+        key = id(self)
+        if key not in memo:
+            memo[key] = self._substitute(solution, memo)
+        return memo[key]
 
 class Number(Object):
     unknownCount = 0
@@ -16,6 +52,26 @@ class Number(Object):
             Number.unknownCount += 1
         else:
             self.value = value if isinstance(value, sp.Expr) else sp.Rational(value)
+
+    @classmethod
+    def unsimplified(cls, value):
+        """A Number whose value is only simplified once something reads it"""
+        number = cls.__new__(cls)
+        number._value = value
+        number._pending = True
+        return number
+
+    @property
+    def value(self):
+        if self._pending:
+            self._value = simplified(self._value)
+            self._pending = False
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        self._value = value
+        self._pending = False
     
     def as_sympy(self):
         if isinstance(self.value, sp.Expr):
@@ -53,8 +109,11 @@ class Number(Object):
     def symbols(self):
         return self.value.free_symbols
     
-    def substitute(self, solution):
-        self.value = sp.simplify(self.value.subs(solution))
+    def _substitute(self, solution, memo):
+        value = self.value
+        if value.free_symbols.isdisjoint(solution):
+            return self
+        return Number.unsimplified(value.xreplace(solution))
 
     def __repr__(self):
         val = self.value
@@ -80,9 +139,11 @@ class Point(Object):
     def symbols(self):
         return self.x.symbols() | self.y.symbols()
     
-    def substitute(self, solution):
-        self.x.substitute(solution)
-        self.y.substitute(solution)
+    def _substitute(self, solution, memo):
+        x, y = self.x.substitute(solution, memo), self.y.substitute(solution, memo)
+        if x is self.x and y is self.y:
+            return self
+        return Point(x, y)
 
     def __eq__(self, other):
         if isinstance(other, Point):
@@ -115,9 +176,11 @@ class Line(Object):
     #     else:
     #         return False
         
-    def substitute(self, solution):
-        for point in self.points:
-            point.substitute(solution)
+    def _substitute(self, solution, memo):
+        points = tuple(point.substitute(solution, memo) for point in self.points)
+        if all(new is old for new, old in zip(points, self.points)):
+            return self
+        return Line(points=points)
         
     # def evaluate(self):
     #     if self.points:
@@ -146,17 +209,21 @@ class Line(Object):
         x2, y2 = self.B.x.as_sympy(), self.B.y.as_sympy()
         return (x1 + t*(x2 - x1), y1 + t*(y2 - y1))
 
+    @cached
     def direction(self):
         """Return direction vector (dx, dy)"""
         x1, y1 = self.A.x.as_sympy(), self.A.y.as_sympy()
         x2, y2 = self.B.x.as_sympy(), self.B.y.as_sympy()
         return (x2 - x1, y2 - y1)
     
+    @cached
     def length_squared(self):
         # This is a bad method, needs updating to be safer
         if len(self.points) == 2:
-            return (self.B.x.value - self.A.x.value)**2 + (self.B.y.value - self.A.y.value)**2
+            dx, dy = self.direction()
+            return dx**2 + dy**2
         
+    @cached
     def length(self):
        return sp.sqrt(self.length_squared())
 
@@ -184,54 +251,61 @@ class Angle(Object):
         self.points = points
         
         
+    @cached
     def as_sympy(self):        
         # atan2(cross, dot) now gives correct oriented angle
         return sp.atan2(self.cross(), self.dot())
+
+    @cached
+    def vectors(self):
+        """Components (BAx, BAy, BCx, BCy) of the two arms from the vertex B"""
+        if len(self.points) == 3:
+            A, B, C = self.points
+            return (A.x.value - B.x.value, A.y.value - B.y.value,
+                    C.x.value - B.x.value, C.y.value - B.y.value)
     
+    @cached
     def cross(self):
         if len(self.points) == 3:
-            BAx = self.points[0].x.value - self.points[1].x.value
-            BAy = self.points[0].y.value - self.points[1].y.value
-            BCx = self.points[2].x.value - self.points[1].x.value
-            BCy = self.points[2].y.value - self.points[1].y.value
+            BAx, BAy, BCx, BCy = self.vectors()
             return BAx*BCy - BAy*BCx
     
+    @cached
     def dot(self):
         if len(self.points) == 3:
-            BAx = self.points[0].x.value - self.points[1].x.value
-            BAy = self.points[0].y.value - self.points[1].y.value
-            BCx = self.points[2].x.value - self.points[1].x.value
-            BCy = self.points[2].y.value - self.points[1].y.value
-            
+            BAx, BAy, BCx, BCy = self.vectors()
             return BAx*BCx + BAy*BCy
     
+    @cached
     def cos(self):
         return self.dot() / self.norm()
             
+    @cached
     def norm(self):
         if len(self.points) == 3:
-            BAx = self.points[0].x.value - self.points[1].x.value
-            BAy = self.points[0].y.value - self.points[1].y.value
-            BCx = self.points[2].x.value - self.points[1].x.value
-            BCy = self.points[2].y.value - self.points[1].y.value
-            
+            BAx, BAy, BCx, BCy = self.vectors()
             return sp.sqrt(BAx**2 + BAy**2) * sp.sqrt(BCx**2 + BCy**2)
     
+    @cached
     def sin(self):
         return self.cross() / self.norm()
         
-    def substitute(self, solution):
-        for point in self.points:
-            point.substitute(solution)
+    def _substitute(self, solution, memo):
+        points = tuple(point.substitute(solution, memo) for point in self.points)
+        if all(new is old for new, old in zip(points, self.points)):
+            return self
+        return Angle(points=points)
         
     def __repr__(self):
         return str(self.as_sympy())
     
     def __eq__(self, other):
         if isinstance(other, Angle):
+            profiler.count('simplify_calls')
             return sp.simplify(sp.And(sp.Eq(self.cos(), other.cos()), 
                           sp.Eq(self.sin(), other.sin())))
         elif isinstance(other, Number):
+            profiler.count('simplify_calls')
             return sp.simplify(sp.And(sp.Eq(self.cos(), sp.cos(other.as_sympy())), 
                           sp.Eq(self.sin(), sp.sin(other.as_sympy()))))
         # return sp.simplify(self.as_sympy() - other.as_sympy()) == 0
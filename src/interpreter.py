@@ -1,5 +1,10 @@
 from .astNodes import *
 from .builtinFuncs import *
+from .budget import BudgetExceeded
+from .checkpoints import Tee
+from . import profiler
+from contextlib import redirect_stdout
+import sys
 # from .solver import Solver, SolverBranch
     
 class Interpreter:
@@ -20,6 +25,9 @@ class Interpreter:
     def __init__(self, context):
         self.context = context
         self.solver = self.context.solver
+        # AST node -> the closure it compiles to for the statement being
+        # executed, see compile(). Emptied after every statement.
+        self.compiled = {}
 
     def printout(self):
         print(self.COLOURS['red'], end="")
@@ -35,80 +43,204 @@ class Interpreter:
         print(self.COLOURS['end'], end="")
         
     
-    def run(self, nodes):
+    def report_limits(self):
+        for limit, message in self.solver.take_limit_reports():
+            print(f"{self.COLOURS['yellow']}Limit {limit} hit: {message}{self.COLOURS['end']}")
+
+    def run(self, nodes, checkpoints=None):
+        """
+        Execute and print each statement as it arrives, nodes may be any
+        iterable including a generator still parsing its input. With
+        checkpoints, statements unchanged since the last run are replayed
+        from their stored output instead of being executed again.
+        """
+        self.solver.start_clock()
+        resuming = checkpoints is not None
         for node in nodes:
-            self.print_registry = {}
-            self.evaluate_node_per_branch(node)
-            # print(self.print_registry)
-            self.printout()
-            print(len(self.solver.branches))
-            
+            if checkpoints is None:
+                self.execute(node)
+                continue
+            key = checkpoints.advance(node)
+            if resuming:
+                output = checkpoints.replay(key)
+                if output is not None:
+                    sys.stdout.write(output)
+                    continue
+                resuming = False
+                checkpoints.restore()
+            tee = Tee(sys.stdout)
+            with redirect_stdout(tee):
+                self.execute(node)
+            checkpoints.record(key, tee.copy.getvalue())
+        if checkpoints is not None:
+            checkpoints.restore()
+            checkpoints.finish()
+
+    def execute(self, node):
+        try:
+            if profiler.active is not None:
+                with profiler.active.statement(node, lambda: len(self.solver.branches)):
+                    return self.evaluate_statement(node)
+            return self.evaluate_statement(node)
+        finally:
+            # A statement runs once, keeping its closures would only hold on
+            # to every node of a streamed program or a long server session
+            self.compiled.clear()
 
-            
+    def evaluate_statement(self, node):
+        self.print_registry = {}
+        try:
+            self.evaluate_node_per_branch(node)
+        except BudgetExceeded:
+            self.report_limits()
+            raise
+        # print(self.print_registry)
+        self.printout()
+        self.report_limits()
+        print(len(self.solver.branches))
 
     def evaluate_node_per_branch(self, node):
+        if self.solver.lazy and isinstance(node, (PrintNode, QueryNode)):
+            self.settle_for(node)
         branches = list(self.context.solver.branches)
+        if self.solver.workers and isinstance(node, (ConstraintNode, NotNode)):
+            self.evaluate_constraint_per_branch(node, branches)
+            return
+        statement = self.compile(node)
+        for branch in branches:
+            statement(branch)
+
+    def evaluate_constraint_per_branch(self, node, branches):
+        """
+        Evaluate the operands of a constraint on every branch here, in branch
+        order so new unknowns are numbered as in a serial run, then hand all of
+        them to the solver at once so it can solve the branches in parallel
+        """
+        constraints = []
         for branch in branches:
-            self.evaluate(node, branch)
+            if isinstance(node, NotNode):
+                if not isinstance(node.inner, ConstraintNode):
+                    raise ValueError("Not must be paired with a constraint")
+                op = f"NOT_{node.inner.operator}"
+                inner = node.inner
+            else:
+                op = node.operator
+                inner = node
+            left = self.evaluate(inner.left, branch)
+            right = self.evaluate(inner.right, branch)
+            constraints.append((branch, left, op, right))
+        self.solver.apply_constraints(constraints)
+
+    def settle_for(self, node):
+        """Lazy mode: solve just the queued constraints the values node asks for depend on"""
+        for branch in list(self.solver.branches):
+            symbols = set()
+            for arg in node.args:
+                value = self.evaluate(arg, branch)
+                if hasattr(value, 'symbols'):
+                    symbols |= set(value.symbols())
+            if symbols:
+                self.solver.settle(branch, symbols)
     
     def evaluate(self, node, branch):
-        
-        # -- Numbers
-        if isinstance(node, NumberNode):
-            return type(node).func(node.value)
-        
-        elif isinstance(node, (ObjectReference, VariableReference)):
-                val = branch.symbols.get(node.name)
-                if val is None:
-                    self.evaluate(ObjectDefinition(node.name, PointNode(NumberNode(None), NumberNode(None))), branch)
-                    return branch.symbols.get(node.name)
-                else:
-                    return val
-        
-        if isinstance(node, NotNode):
-            if isinstance(node.inner, ConstraintNode):
-                left = self.evaluate(node.inner.left, branch)
-                op = node.inner.operator
-                right = self.evaluate(node.inner.right, branch)
-                new_branches = branch.add_constraint(left, f"NOT_{op}", right)
-                self.solver.branches.remove(branch)
-                self.solver.add_branches(new_branches)
-                self.solver.prune()
+        return self.compile(node)(branch)
+
+    def compile(self, node):
+        """
+        Turn a node into a closure taking a branch, so the work of dispatching
+        on node types happens once per node rather than once per evaluation
+        """
+        compiled = self.compiled.get(node)
+        if compiled is None:
+            compiler = self.COMPILERS.get(type(node))
+            if compiler is None:
+                def compiled(branch):
+                    raise ValueError(f"Unknown AST Node type: {type(node)}. Node: {node}")
             else:
+                compiled = compiler(self, node)
+            self.compiled[node] = compiled
+        return compiled
+
+    # -- Numbers
+    def compile_number(self, node):
+        func, value = type(node).func, node.value
+        return lambda branch: func(value)
+
+    def compile_reference(self, node):
+        name = node.name
+        def reference(branch):
+            val = branch.symbols.get(name)
+            if val is None:
+                # First mention of an object makes it a fully unknown point
+                branch.add_object(name, make_point(make_number(None), make_number(None)))
+                return branch.symbols.get(name)
+            return val
+        return reference
+
+    def compile_not(self, node):
+        if not isinstance(node.inner, ConstraintNode):
+            def invalid(branch):
                 raise ValueError("Not must be paired with a constraint")
-                
-        
-        # -- Object/Variable Definitions
-        elif isinstance(node, (ObjectDefinition, VariableDefinition)):
-            ident = node.ident if not isinstance(node.ident, ASTNode) or isinstance(node.ident, (CollectionNode, ObjectReference, VariableReference)) else self.evaluate(node.ident, branch)
-            value = node.value if not isinstance(node.value, ASTNode) or isinstance(node.value, (CollectionNode, )) else self.evaluate(node.value, branch)
-            if isinstance(ident, (ObjectReference, VariableReference)): 
-                ident = ident.name
-            # Handle Collections
-            if isinstance(ident, CollectionNode):
-                # Both Collections
-                if isinstance(value, CollectionNode):
-                    if len(ident) == len(value):
-                        for i in range(len(ident)):
-                            self.evaluate(ObjectDefinition(ident.items[i], value.items[i]), branch)
-                    else:
-                        raise ValueError(f"Mismatched Collection Sizes: {len(ident)} and {len(value)}")
-                # Collection = value
-                else:
-                    self.evaluate(ObjectDefinition(ident.items[0], value), branch)
-                    for i in range(len(ident)-1):
-                        fresh_value = self.evaluate(node.value, branch)
-                        self.evaluate(ObjectDefinition(ident.items[i+1], fresh_value), branch)
-            # Obj = Collection
-            elif isinstance(value, CollectionNode):
-                branch.add_object(ident, Collection(value.items))
-            # Stanadrd A = B
-            else:
-                branch.add_object(ident, value)
+            return invalid
+        return self.compile_constraint(node.inner, f"NOT_{node.inner.operator}")
 
-        elif isinstance(node, PrintNode):
-            for arg in node.args:
-                evaluated_arg = self.evaluate(arg, branch)
+    # -- Object/Variable Definitions
+    def compile_ident(self, node):
+        if isinstance(node, (ObjectReference, VariableReference)):
+            name = node.name
+            return lambda branch: name
+        if isinstance(node, ASTNode) and not isinstance(node, CollectionNode):
+            return self.compile(node)
+        return lambda branch: node
+
+    def compile_value(self, node):
+        if isinstance(node, ASTNode) and not isinstance(node, CollectionNode):
+            return self.compile(node)
+        return lambda branch: node
+
+    def compile_definition(self, node):
+        return self.compile_binding(node.ident, node.value)
+
+    def compile_binding(self, ident_node, value_node):
+        # Handle Collections
+        if isinstance(ident_node, CollectionNode):
+            # Both Collections
+            if isinstance(value_node, CollectionNode):
+                if len(ident_node) != len(value_node):
+                    def mismatched(branch):
+                        raise ValueError(f"Mismatched Collection Sizes: {len(ident_node)} and {len(value_node)}")
+                    return mismatched
+                bindings = [self.compile_binding(ident, value) for ident, value in zip(ident_node.items, value_node.items)]
+                def bind_each(branch):
+                    for binding in bindings:
+                        binding(branch)
+                return bind_each
+            # Collection = value, evaluated afresh for every name
+            idents = [self.compile_ident(item) for item in ident_node.items]
+            value = self.compile_value(value_node)
+            def bind_all(branch):
+                for ident in idents:
+                    evaluated = value(branch)
+                    branch.add_object(ident(branch), evaluated)
+            return bind_all
+
+        ident = self.compile_ident(ident_node)
+        # Obj = Collection
+        if isinstance(value_node, CollectionNode):
+            items = value_node.items
+            return lambda branch: branch.add_object(ident(branch), Collection(items))
+        # Standard A = B
+        value = self.compile_value(value_node)
+        def bind(branch):
+            name = ident(branch)
+            branch.add_object(name, value(branch))
+        return bind
+
+    def compile_print(self, node):
+        args = [(arg, self.compile(arg)) for arg in node.args]
+        def printer(branch):
+            for arg, evaluate_arg in args:
+                evaluated_arg = evaluate_arg(branch)
                 if self.print_registry.get(arg) is None:
                     self.print_registry[arg] = [evaluated_arg]
                 else:
@@ -117,44 +249,57 @@ class Interpreter:
                             break
                     else:
                         self.print_registry[arg].append(evaluated_arg)
-            
-        # -- Keywords 
-        elif isinstance(node, (PointNode, CircleNode, LineNode, AngleNode)):
-            evaluated_args = []
-            for arg in node.args:
-                evaluated_arg = self.evaluate(arg, branch)
-                evaluated_args.append(evaluated_arg)
-            return type(node).func(*evaluated_args)
-        
-        elif isinstance(node, BinaryOp):
-            left = self.evaluate(node.left, branch)
-            right = self.evaluate(node.right, branch)
-            op = node.op
-            return self.BINARY_OPS[op](left, right)
-                
-        
-        # -- Collections
-        elif isinstance(node, CollectionNode):
-            return node
-    
-        # -- Constraints
-        elif isinstance(node, ConstraintNode):
-            left = self.evaluate(node.left, branch)
-            right = self.evaluate(node.right, branch)
-            # self.solver.add_constraint(left, node.operator, right)
-            new_branches = branch.add_constraint(left, node.operator, right)
-            self.solver.branches.remove(branch)
-            self.solver.add_branches(new_branches)
-            self.solver.prune()
-            
-        elif isinstance(node, QueryNode):
-            evaluated_args = []
-            for arg in node.args:
-                evaluated_args.append(self.evaluate(arg, branch))
-            # self.solver.refine()
-            return BUILTINFUNCS[node.func](*evaluated_args, context=self.context)
-        
-        
-        else:
-            raise ValueError(f"Unknown AST Node type: {type(node)}. Node: {node}")
-            
\ No newline at end of file
+        return printer
+
+    # -- Keywords
+    def compile_object(self, node):
+        func = type(node).func
+        args = [self.compile(arg) for arg in node.args]
+        return lambda branch: func(*[arg(branch) for arg in args])
+
+    def compile_binary_op(self, node):
+        left, right = self.compile(node.left), self.compile(node.right)
+        op = self.BINARY_OPS[node.op]
+        def binary_op(branch):
+            evaluated_left = left(branch)
+            return op(evaluated_left, right(branch))
+        return binary_op
+
+    # -- Collections
+    def compile_collection(self, node):
+        return lambda branch: node
+
+    # -- Constraints
+    def compile_constraint(self, node, op=None):
+        left, right = self.compile(node.left), self.compile(node.right)
+        op = op or node.operator
+        def constraint(branch):
+            evaluated_left = left(branch)
+            self.solver.apply_constraint(branch, evaluated_left, op, right(branch))
+        return constraint
+
+    def compile_query(self, node):
+        name = node.func
+        args = [self.compile(arg) for arg in node.args]
+        def query(branch):
+            evaluated_args = [arg(branch) for arg in args]
+            return BUILTINFUNCS[name](*evaluated_args, context=self.context)
+        return query
+
+    COMPILERS = {
+        NumberNode: compile_number,
+        ObjectReference: compile_reference,
+        VariableReference: compile_reference,
+        NotNode: compile_not,
+        ObjectDefinition: compile_definition,
+        VariableDefinition: compile_definition,
+        PrintNode: compile_print,
+        PointNode: compile_object,
+        CircleNode: compile_object,
+        LineNode: compile_object,
+        AngleNode: compile_object,
+        BinaryOp: compile_binary_op,
+        CollectionNode: compile_collection,
+        ConstraintNode: compile_constraint,
+        QueryNode: compile_query,
+    }
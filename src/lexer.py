@@ -1,6 +1,9 @@
+import re
 from .tokens import TokenType
 
 class Token:
+    __slots__ = ('type', 'value')
+
     def __init__(self, tType, value=None):
         self.type = tType
         self.value = value
@@ -46,71 +49,78 @@ class Lexer:
         'or': TokenType.OR,
         'd': TokenType.DEG
     }
-    def __init__(self):
-        self.pos = 0
-        
-    def next_char(self):
-        if self.pos >= len(self.text):
-            return None
-        ch = self.text[self.pos]
-        self.pos += 1
-        return ch
-    
-    def peek(self):
-        if self.pos >= len(self.text):
-            return None
-        return self.text[self.pos]
+    # One alternative per kind of token, tried in this order once whitespace
+    # other than newlines is skipped. The symbol class holds the one character
+    # SYMBOLS, a run of the same one is split up in classify_symbol
+    PATTERN = re.compile(r"""
+        [^\S\n]*
+        (?:
+            (?P<newline>\n)
+          | (?P<number>\d[\d.]*|\.\d[\d.]*)
+          | (?P<word>[^\W\d]\w*)
+          | (?P<symbol>(?P<ch>[?@=^*<+\-/(),#:.])(?P=ch)*)
+          | (?P<end>\Z)
+          | (?P<error>.)
+        )
+    """, re.VERBOSE)
 
     def generate_tokens(self, text):
-        self.text = text
-        tokens = []
-        
-        while (ch := self.next_char()) is not None:
-            # ignore whitespace
-            if ch == '\n':
-                tokens.append(Token(TokenType.NEWLINE))
-            if ch.isspace():
-                continue
-            # if token begins with uppercase letter
-            elif ch.isupper():
-                ident = ch
-                # collect rest of token
-                while ((nxt := self.peek()) and ((nxt.isalnum() and not nxt.isupper()) or nxt == '_' )):
-                    ident += self.next_char()
-                if ident in self.KEYWORDS:
-                    tokens.append(Token(TokenType.KEYWORD, ident))
-                else:
-                    tokens.append(Token(TokenType.OBJECT, ident))
-            elif ch.islower() or ch == '_':
-                ident = ch
-                # collect the rest
-                while ((nxt := self.peek()) and (nxt.isalnum() or nxt == '_')):
-                    ident += self.next_char()
-                if ident in self.SYMBOLS:
-                    tokens.append(Token(self.SYMBOLS[ident], ident))
-                else:
-                    tokens.append(Token(TokenType.IDENTIFIER, ident))
-                    
-            # if token is a number
-            elif ch.isdigit() or (ch == '.' and self.peek() and self.peek().isdigit()):
-                num = ch
-                while ((nxt := self.peek()) and (nxt.isdigit() or nxt == '.')):
-                    num += self.next_char()
-                tokens.append(Token(TokenType.NUMBER, float(num)))
-            # Symbols
-            elif ch in self.SYMBOLS:
-                occ = 1
-                while ((nxt := self.peek()) and nxt in self.SYMBOLS and self.SYMBOLS[ch] == self.SYMBOLS[nxt]):
-                    occ += 1
-                    self.next_char()
-                symType = self.SYMBOLS.get(ch*occ)
-                if symType is not None:
-                    tokens.append(Token(symType, ch*occ))
-                else:
-                    symType = self.SYMBOLS.get(ch)
-                    tokens.extend([Token(symType, ch)]*occ)
-            else:
-                raise Exception(f'Unexpected character: {ch}')
-        
-        tokens.append(Token(TokenType.EOF))
-        return tokens
\ No newline at end of file
+        return list(self.iter_tokens(text))
+
+    def iter_tokens(self, source):
+        """
+        Yield the tokens of source one at a time, ending with EOF.
+        source is a string or any iterable of lines such as an open file or
+        sys.stdin, which is read a line at a time as tokens are asked for.
+        """
+        # Tokens are never modified, so each distinct lexeme is classified once
+        # and its tokens shared by every occurrence
+        known = {'\n': (Token(TokenType.NEWLINE),)}
+        # No token spans a newline, so lines can be lexed independently
+        chunks = (source,) if isinstance(source, str) else source
+
+        for chunk in chunks:
+            for match in self.PATTERN.finditer(chunk):
+                kind = match.lastgroup
+                lexeme = match.group(kind)
+                found = known.get(lexeme)
+                if found is None:
+                    if kind == 'end':
+                        found = ()
+                    elif kind == 'error':
+                        raise Exception(f'Unexpected character: {lexeme}')
+                    else:
+                        found = getattr(self, f'classify_{kind}')(lexeme)
+                    known[lexeme] = found
+                yield from found
+
+        yield Token(TokenType.EOF)
+
+    def classify_word(self, lexeme):
+        first = lexeme[0]
+        # if token begins with uppercase letter, it runs up to the next uppercase letter
+        if first.isupper():
+            found = []
+            start = 0
+            for i in range(1, len(lexeme) + 1):
+                if i == len(lexeme) or lexeme[i].isupper():
+                    ident = lexeme[start:i]
+                    found.append(Token(TokenType.KEYWORD if ident in self.KEYWORDS else TokenType.OBJECT, ident))
+                    start = i
+            return tuple(found)
+        elif first.islower() or first == '_':
+            if lexeme in self.SYMBOLS:
+                return (Token(self.SYMBOLS[lexeme], lexeme),)
+            return (Token(TokenType.IDENTIFIER, lexeme),)
+        raise Exception(f'Unexpected character: {first}')
+
+    def classify_number(self, lexeme):
+        return (Token(TokenType.NUMBER, float(lexeme)),)
+
+    def classify_symbol(self, lexeme):
+        # A run of one character is a single token if it spells one (==, //, ...)
+        symType = self.SYMBOLS.get(lexeme)
+        if symType is not None:
+            return (Token(symType, lexeme),)
+        ch = lexeme[0]
+        return (Token(self.SYMBOLS[ch], ch),) * len(lexeme)
@@ -0,0 +1,165 @@
+import numpy as np
+import sympy as sp
+from functools import lru_cache
+
+SEEDS = 16          # starting points tried per system
+SEED_SCALE = 10.0   # seeds are drawn uniformly from [-SEED_SCALE, SEED_SCALE], after the origin
+MAX_ITER = 100
+TOLERANCE = 1e-12   # residual norm accepted as a root
+STEP_TOLERANCE = 1e-10  # step size, relative to the root, below which iteration has converged
+SEPARATION = TOLERANCE ** 0.5  # roots closer than this (in every coordinate) are the same root
+POLISH_STEPS = 5    # Newton steps taken on each converged root
+DIGITS = 10         # decimals kept when a root is handed back to SymPy
+SINGULAR_DIGITS = 7  # decimals kept of a root where the Jacobian is singular
+
+
+@lru_cache(maxsize=1024)
+def compile_system(eqs, unknowns):
+    """
+    Lambdify the residuals (lhs - rhs) of eqs and their Jacobian in unknowns
+    into NumPy functions of a single coordinate vector.
+    """
+    residuals = sp.Matrix([eq.lhs - eq.rhs for eq in eqs])
+    jacobian = residuals.jacobian(list(unknowns))
+    f = sp.lambdify([list(unknowns)], residuals, modules='numpy')
+    J = sp.lambdify([list(unknowns)], jacobian, modules='numpy')
+    return (
+        lambda x: np.asarray(f(x), dtype=float).reshape(-1),
+        lambda x: np.asarray(J(x), dtype=float).reshape(len(eqs), len(unknowns)),
+    )
+
+
+def levenberg_marquardt(f, J, x):
+    """Damped Newton iteration from x, returns the root or None if it fails to converge"""
+    damping = 1e-3
+    with np.errstate(all='ignore'):
+        r = f(x)
+        for _ in range(MAX_ITER):
+            if not np.all(np.isfinite(r)):
+                return None
+            jac = J(x)
+            if not np.all(np.isfinite(jac)):
+                return None
+            A = jac.T @ jac
+            g = jac.T @ r
+            try:
+                step = np.linalg.solve(A + damping * (np.diag(np.diag(A)) + np.eye(len(x))), -g)
+            except np.linalg.LinAlgError:
+                return None
+            x_new = x + step
+            r_new = f(x_new)
+            if np.all(np.isfinite(r_new)) and np.linalg.norm(r_new) < np.linalg.norm(r):
+                x, r = x_new, r_new
+                damping = max(damping / 10, 1e-12)
+                # A small residual alone is not enough, near a double root it
+                # is reached while still about sqrt(TOLERANCE) away from it
+                if np.linalg.norm(r) < TOLERANCE and np.linalg.norm(step) < STEP_TOLERANCE * (1 + np.linalg.norm(x)):
+                    return x
+            elif np.linalg.norm(r) < TOLERANCE:
+                # No step improves on a residual this small any more
+                return x
+            else:
+                damping *= 10
+                if damping > 1e12:
+                    return None
+    return x if np.linalg.norm(r) < TOLERANCE else None
+
+
+def polish(f, J, x):
+    """A few plain Newton (least squares) steps from x, kept only while they lower the residual"""
+    r = f(x)
+    with np.errstate(all='ignore'):
+        for _ in range(POLISH_STEPS):
+            jac = J(x)
+            if not np.all(np.isfinite(jac)):
+                break
+            step = np.linalg.lstsq(jac, -r, rcond=None)[0]
+            r_new = f(x + step)
+            if not np.all(np.isfinite(r_new)) or np.linalg.norm(r_new) >= np.linalg.norm(r):
+                break
+            x, r = x + step, r_new
+    return x
+
+
+def null_space(J, root):
+    """
+    Rows spanning the null space of the Jacobian at root, empty where it has
+    full rank, or None if the Jacobian is not finite there
+    """
+    with np.errstate(all='ignore'):
+        jac = J(root)
+    if not np.all(np.isfinite(jac)):
+        return None
+    _, singular, rows = np.linalg.svd(jac)
+    rank = int(np.sum(singular > SEPARATION * max(1.0, singular.max(initial=0.0))))
+    return rows[rank:]
+
+
+def same_root(f, J, root, other):
+    """
+    Whether two converged roots are one root: close in every coordinate, or,
+    where the Jacobian is singular as at a tangential root, with a residual
+    at their midpoint as small as at a root. Distinct regular roots can have
+    another root between them (x**3 - x at -1, 0 and 1), so they are only
+    ever compared by distance.
+    """
+    if np.max(np.abs(root - other)) < SEPARATION:
+        return True
+    if not any(len(null) for null in (null_space(J, root), null_space(J, other)) if null is not None):
+        return False
+    with np.errstate(all='ignore'):
+        midpoint = f((root + other) / 2)
+    return bool(np.all(np.isfinite(midpoint)) and np.linalg.norm(midpoint) < TOLERANCE)
+
+
+def root_digits(f, J, root):
+    """
+    Decimals root can be trusted to, or None if it is not an isolated
+    solution. Where the Jacobian has full rank it is, otherwise iterate again
+    from a point moved off it along the null space: a tangential root draws
+    it back, while a rank deficient system (dependent equations) finds
+    another solution on the same curve. A tangential root is only found to
+    about the square root of machine precision, so it keeps SINGULAR_DIGITS.
+    """
+    null = null_space(J, root)
+    if null is None:
+        return None
+    if not len(null):
+        return DIGITS
+    for direction in null:
+        moved = levenberg_marquardt(f, J, root + 1e-3 * direction)
+        # Distance alone, the midpoint test of same_root holds all along a curve
+        if moved is not None and np.max(np.abs(polish(f, J, moved) - root)) >= SEPARATION:
+            return None
+    return SINGULAR_DIGITS
+
+
+def solve_numeric(eqs, unknowns):
+    """
+    Numeric stand-in for sp.solve(eqs, unknowns, dict=True) on a fully
+    determined system. Every seed that converges gives a root, and roots that
+    differ after rounding to DIGITS decimals are returned as separate solutions.
+    Returns None if the roots are not isolated, the equations not being
+    independent enough to determine the unknowns.
+    """
+    f, J = compile_system(tuple(eqs), tuple(unknowns))
+    rng = np.random.default_rng(0)
+    roots = []
+    # The origin as well, whose root (often a coordinate of 0) random seeds easily miss
+    seeds = [np.zeros(len(unknowns)), *rng.uniform(-SEED_SCALE, SEED_SCALE, size=(SEEDS, len(unknowns)))]
+    for seed in seeds:
+        root = levenberg_marquardt(f, J, seed)
+        if root is None:
+            continue
+        root = polish(f, J, root)
+        if not any(same_root(f, J, root, other) for other in roots):
+            roots.append(root)
+    digits = [root_digits(f, J, root) for root in roots]
+    if None in digits:
+        return None
+    # + 0.0 turns -0.0 into 0.0
+    roots = sorted(set(tuple(round(float(value), n) + 0.0 for value in root) for root, n in zip(roots, digits)))
+    return [
+        {sym: sp.Float(value, DIGITS + 5) for sym, value in zip(unknowns, root)}
+        for root in roots
+    ]
@@ -1,5 +1,6 @@
 from .tokens import TokenType
 from .astNodes import *
+from .lexer import Token
 
 class Parser:
     OPERATOR_PRECEDENCE = {
@@ -35,6 +36,7 @@ class Parser:
 
     def parseTokens(self, tokens):
         self.tokens = tokens
+        self.pos = 0
         astNodes = []
         while (tok := self.peek()) and tok.type != TokenType.EOF:
             # Skip comments
@@ -53,6 +55,23 @@ class Parser:
                 astNodes.append(node)
         return astNodes
 
+    def parseStream(self, tokens):
+        """
+        Yield statement nodes from an iterable of tokens as soon as each line
+        is complete, so a long input never has to be held in memory at once.
+        Statements never continue past a newline, so each line is parsed alone.
+        """
+        line = []
+        for token in tokens:
+            line.append(token)
+            if token.type in (TokenType.NEWLINE, TokenType.EOF):
+                if token.type == TokenType.NEWLINE:
+                    line.append(Token(TokenType.EOF))
+                yield from self.parseTokens(line)
+                line = []
+        if line:
+            yield from self.parseTokens(line + [Token(TokenType.EOF)])
+
     def parseStatement(self):
         # VariableDefinition, ObjectDefinition, Constraint, QueryStatement, ShorthandDefinition, etc.
         left_expr = self.parseExpression()
@@ -0,0 +1,154 @@
+import itertools
+import numpy as np
+import sympy as sp
+
+COLLINEAR_TOLERANCE = 1e-9  # |cross| relative to the arm lengths below which a triple is collinear
+
+
+def point_coordinates(point):
+    """(x, y) floats of a fully defined Point, None if it still has unknowns or is not real"""
+    try:
+        x, y = complex(sp.N(point.x.value)), complex(sp.N(point.y.value))
+    except (TypeError, ValueError, AttributeError):
+        return None
+    if x.imag or y.imag:
+        return None
+    return x.real, y.real
+
+
+def all_triples(n):
+    """Every (a, b, c) index triple with a < b < c, as a (T, 3) array"""
+    return np.array(list(itertools.combinations(range(n), 3)), dtype=np.intp).reshape(-1, 3)
+
+
+# Kernels. coords is (..., N, 2), any leading axes being a batch of
+# configurations of the same N points, and triples is (T, 3) indices
+# (a, b, c) with b the vertex where it matters.
+
+def arms(coords, triples):
+    """The vectors b->a and b->c of every triple, each (..., T, 2)"""
+    triples = np.asarray(triples, dtype=np.intp)
+    a, b, c = (coords[..., triples[:, i], :] for i in range(3))
+    return a - b, c - b
+
+
+def pairwise_distances(coords):
+    """(..., N, N) distances between every pair of points"""
+    delta = coords[..., :, None, :] - coords[..., None, :, :]
+    return np.hypot(delta[..., 0], delta[..., 1])
+
+
+def angles(coords, triples):
+    """(..., T) unsigned angle at b in radians, NaN where an arm has zero length"""
+    ba, bc = arms(coords, triples)
+    cross = ba[..., 0] * bc[..., 1] - ba[..., 1] * bc[..., 0]
+    dot = (ba * bc).sum(axis=-1)
+    degenerate = (np.hypot(ba[..., 0], ba[..., 1]) == 0) | (np.hypot(bc[..., 0], bc[..., 1]) == 0)
+    # atan2 of |cross| and dot stays accurate near 0 and pi, unlike acos
+    return np.where(degenerate, np.nan, np.arctan2(np.abs(cross), dot))
+
+
+def angle_table(coords):
+    """(..., N, N, N) angles, [a, b, c] being the angle at b, NaN on repeated points"""
+    n = coords.shape[-2]
+    triples = np.array(list(itertools.product(range(n), repeat=3)), dtype=np.intp).reshape(-1, 3)
+    return angles(coords, triples).reshape(*coords.shape[:-2], n, n, n)
+
+
+def collinear(coords, triples, tol=COLLINEAR_TOLERANCE):
+    """(..., T) whether each triple lies on one line, within tol relative to its arm lengths"""
+    ba, bc = arms(coords, triples)
+    cross = ba[..., 0] * bc[..., 1] - ba[..., 1] * bc[..., 0]
+    scale = np.hypot(ba[..., 0], ba[..., 1]) * np.hypot(bc[..., 0], bc[..., 1])
+    return np.abs(cross) <= tol * np.maximum(scale, 1.0)
+
+
+def circumcircles(coords, triples):
+    """
+    Centres (..., T, 2) and radii (..., T) of the circles through each triple,
+    NaN for collinear triples, which have none
+    """
+    triples = np.asarray(triples, dtype=np.intp)
+    a, b, c = (coords[..., triples[:, i], :] for i in range(3))
+    # Solve relative to a, so the determinant is the cross product of the arms
+    ab, ac = b - a, c - a
+    det = 2 * (ab[..., 0] * ac[..., 1] - ab[..., 1] * ac[..., 0])
+    ab2, ac2 = (ab ** 2).sum(axis=-1), (ac ** 2).sum(axis=-1)
+    flat = collinear(coords, triples)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ux = (ac[..., 1] * ab2 - ab[..., 1] * ac2) / det
+        uy = (ab[..., 0] * ac2 - ac[..., 0] * ab2) / det
+    ux, uy = np.where(flat, np.nan, ux), np.where(flat, np.nan, uy)
+    centres = a + np.stack([ux, uy], axis=-1)
+    return centres, np.hypot(ux, uy)
+
+
+class PointArray:
+    """
+    The fully defined points of one or many configurations as a float array
+    of shape (..., N, 2), with names[i] labelling row i. The methods run the
+    kernels above over every configuration at once and take point names.
+    """
+    def __init__(self, coords, names):
+        self.coords = np.asarray(coords, dtype=float)
+        self.names = list(names)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        if self.coords.shape[-2:] != (len(self.names), 2):
+            raise ValueError(f"Coordinates of shape {self.coords.shape} do not fit {len(self.names)} points")
+
+    @classmethod
+    def from_symbols(cls, symbols):
+        """The points of a symbols dict (as on a SolverBranch) whose coordinates are fully defined"""
+        from .geometry import Point
+        names, coords = [], []
+        for name, obj in symbols.items():
+            if isinstance(obj, Point) and (xy := point_coordinates(obj)) is not None:
+                names.append(name)
+                coords.append(xy)
+        return cls(np.array(coords, dtype=float).reshape(-1, 2), names)
+
+    @classmethod
+    def from_branches(cls, branches, names=None):
+        """
+        One (B, N, 2) array for many branches, over names or else the points
+        defined in all of them, in the order the first branch has them
+        """
+        arrays = [cls.from_symbols(branch.symbols) for branch in branches]
+        if names is None:
+            common = set.intersection(*[set(array.names) for array in arrays]) if arrays else set()
+            names = [name for name in (arrays[0].names if arrays else []) if name in common]
+        missing = [(i, name) for i, array in enumerate(arrays) for name in names if name not in array.index]
+        if missing:
+            raise ValueError(f"Point {missing[0][1]} is not defined in branch {missing[0][0]}")
+        coords = np.array([[array.coords[array.index[name]] for name in names] for array in arrays], dtype=float)
+        return cls(coords.reshape(len(arrays), len(names), 2), names)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getitem__(self, name):
+        return self.coords[..., self.index[name], :]
+
+    def triples(self, labels=None):
+        """(T, 3) indices for labels like ['ABC', ('A', 'B', 'D')], or every triple if None"""
+        if labels is None:
+            return all_triples(len(self))
+        return np.array([[self.index[name] for name in label] for label in labels], dtype=np.intp).reshape(-1, 3)
+
+    def distances(self):
+        return pairwise_distances(self.coords)
+
+    def angles(self, labels=None):
+        return angles(self.coords, self.triples(labels))
+
+    def angle_table(self):
+        return angle_table(self.coords)
+
+    def collinear(self, labels=None, tol=COLLINEAR_TOLERANCE):
+        return collinear(self.coords, self.triples(labels), tol)
+
+    def circumcircles(self, labels=None):
+        return circumcircles(self.coords, self.triples(labels))
+
+    def __repr__(self):
+        return f"PointArray({', '.join(self.names)}; shape {self.coords.shape})"
@@ -0,0 +1,141 @@
+import functools
+import json
+import os
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+# The Profiler collecting timings, None (the default) turns every hook into a no-op
+active = None
+
+CATEGORIES = ('evaluate', 'add_constraint', 'refine', 'solve', 'is_valid', 'prune', 'clone')
+COUNTERS = ('branches_created', 'branches_deduped', 'branches_pruned', 'or_splits', 'simplify_calls')
+
+
+def timed(category):
+    """Decorator timing every call of a function under category while profiling"""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if active is None:
+                return func(*args, **kwargs)
+            with active.span(category):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def count(counter, n=1):
+    if active is not None:
+        active.counters[counter] += n
+
+
+@contextmanager
+def profiling(profiler=None):
+    """Turn profiling on for the duration, yielding the Profiler that collects it"""
+    global active
+    previous, active = active, profiler or Profiler()
+    try:
+        yield active
+    finally:
+        active = previous
+
+
+class Profiler:
+    """
+    Per-statement time split into CATEGORIES plus COUNTERS. Time is
+    exclusive, a span's own time excludes the spans nested inside it, so the
+    split of a statement adds up to its total. Every span is also kept as a
+    Chrome trace event for chrome://tracing or Perfetto. Spans in solver
+    worker processes are not seen.
+    """
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.counters = Counter()
+        self.events = []
+        self.statements = []
+        # Time spent in the children of each open span
+        self._children = []
+        self._split = Counter()
+
+    def _us(self, moment):
+        return round((moment - self.origin) * 1e6, 3)
+
+    @contextmanager
+    def span(self, category, **args):
+        start = time.perf_counter()
+        self._children.append(0.0)
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            duration = end - start
+            children = self._children.pop()
+            if self._children:
+                self._children[-1] += duration
+            self._split[category] += duration - children
+            event = {'name': category, 'cat': category, 'ph': 'X', 'ts': self._us(start),
+                     'dur': round(duration * 1e6, 3), 'pid': os.getpid(), 'tid': 0}
+            if args:
+                event['args'] = args
+            self.events.append(event)
+
+    @contextmanager
+    def statement(self, node, branches):
+        """Profile one statement, whose time outside any other category counts as evaluate"""
+        self._split = Counter()
+        before = Counter(self.counters)
+        start = time.perf_counter()
+        try:
+            with self.span('evaluate', statement=str(node)):
+                yield
+        finally:
+            self.statements.append({
+                'statement': str(node),
+                'seconds': time.perf_counter() - start,
+                'split': {category: self._split[category] for category in CATEGORIES},
+                'counters': {counter: self.counters[counter] - before[counter] for counter in COUNTERS},
+                'branches': branches(),
+            })
+            self.events.append({'name': 'branches', 'ph': 'C', 'ts': self._us(time.perf_counter()),
+                                'pid': os.getpid(), 'tid': 0, 'args': {'branches': branches()}})
+
+    def table(self):
+        """Human readable report, one row per statement and a total row"""
+        headers = ['statement', 'total ms', *[f'{category} ms' for category in CATEGORIES], *COUNTERS, 'branches']
+        rows = []
+        totals = Counter()
+        for stat in self.statements:
+            text = stat['statement']
+            rows.append([
+                text if len(text) <= 40 else text[:37] + '...',
+                f"{stat['seconds'] * 1000:.2f}",
+                *[f"{stat['split'][category] * 1000:.2f}" for category in CATEGORIES],
+                *[str(stat['counters'][counter]) for counter in COUNTERS],
+                str(stat['branches']),
+            ])
+            totals['seconds'] += stat['seconds']
+            totals.update(stat['split'])
+            totals.update(stat['counters'])
+        rows.append([
+            'TOTAL',
+            f"{totals['seconds'] * 1000:.2f}",
+            *[f"{totals[category] * 1000:.2f}" for category in CATEGORIES],
+            *[str(totals[counter]) for counter in COUNTERS],
+            str(self.statements[-1]['branches']) if self.statements else '0',
+        ])
+        widths = [max(len(row[i]) for row in [headers, *rows]) for i in range(len(headers))]
+        lines = ['  '.join(cell.ljust(width) if i == 0 else cell.rjust(width)
+                           for i, (cell, width) in enumerate(zip(row, widths)))
+                 for row in [headers, *rows]]
+        lines.insert(1, '  '.join('-' * width for width in widths))
+        lines.insert(len(lines) - 1, lines[1])
+        return '\n'.join(lines)
+
+    def chrome_trace(self):
+        return {'traceEvents': self.events, 'displayTimeUnit': 'ms',
+                'otherData': {'counters': dict(self.counters), 'statements': self.statements}}
+
+    def write_trace(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.chrome_trace(), f)
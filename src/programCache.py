@@ -0,0 +1,88 @@
+import hashlib
+import os
+import pickle
+import sys
+
+VERSION = '1'
+CACHE_DIR = '__eklcache__'
+MAGIC = b'EKLC'
+# Modules whose source decides what a program parses to, a change to any of
+# them makes every stored program stale
+FRONTEND = ('tokens.py', 'lexer.py', 'parser.py', 'astNodes.py')
+
+
+def interpreter_version(modules=FRONTEND):
+    """Digest of VERSION, the Python version and the source of modules"""
+    digest = hashlib.sha256(f'{VERSION}|{sys.version_info[:2]}'.encode())
+    here = os.path.dirname(os.path.abspath(__file__))
+    for name in modules:
+        with open(os.path.join(here, name), 'rb') as f:
+            digest.update(f.read())
+    return digest.digest()
+
+
+def cache_path(source_path, suffix='.eklc'):
+    """foo/bar.ekl -> foo/__eklcache__/bar.eklc"""
+    folder, name = os.path.split(os.path.abspath(source_path))
+    return os.path.join(folder, CACHE_DIR, os.path.splitext(name)[0] + suffix)
+
+
+class ProgramCache:
+    """
+    Parsed programs stored next to their source like __pycache__, so a rerun
+    of an unchanged file skips the Lexer and Parser. A .eklc file is MAGIC,
+    the key (source hash + interpreter version) and the pickled node list.
+    Entries are unpickled, so only load files you trust.
+    """
+    def __init__(self):
+        self.version = interpreter_version()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, source):
+        return hashlib.sha256(self.version + source.encode()).digest()
+
+    def load(self, source_path, source):
+        """The cached nodes for source, or None if there is no valid entry"""
+        try:
+            with open(cache_path(source_path), 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        header = MAGIC + self.key(source)
+        if not data.startswith(header):
+            return None
+        try:
+            return pickle.loads(data[len(header):])
+        except Exception:
+            return None
+
+    def store(self, source_path, source, nodes):
+        path = cache_path(source_path)
+        data = MAGIC + self.key(source) + pickle.dumps(nodes, protocol=pickle.HIGHEST_PROTOCOL)
+        temp = f'{path}.{os.getpid()}.tmp'
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(temp, 'wb') as f:
+                f.write(data)
+            # Readers see either the old entry or the new one, never half of one
+            os.replace(temp, path)
+        except OSError:
+            # Caching is best effort, a read-only folder just means no cache
+            if os.path.exists(temp):
+                os.remove(temp)
+
+    def parse(self, source_path, source, parse, rebuild=False):
+        """parse(source), going through the cache unless rebuild is set"""
+        if not rebuild:
+            nodes = self.load(source_path, source)
+            if nodes is not None:
+                self.hits += 1
+                return nodes
+        self.misses += 1
+        nodes = parse(source)
+        self.store(source_path, source, nodes)
+        return nodes
+
+    def __repr__(self):
+        return f"ProgramCache({self.hits} hits, {self.misses} misses)"
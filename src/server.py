@@ -0,0 +1,144 @@
+import io
+import json
+import re
+import socketserver
+import sys
+from contextlib import redirect_stdout
+from .eukleia import Eukleia
+
+DEFAULT_PORT = 7453
+# Colour codes the interpreter prints, stripped from server responses
+ANSI = re.compile(r'\033\[[0-9;]*m')
+
+
+class Session:
+    """One warm Eukleia whose solver state carries over from one run() to the next"""
+    def __init__(self, **solver_options):
+        self.program = Eukleia(**solver_options)
+        # Load the solver backend now rather than on the first request
+        self.program.interpreter
+
+    @property
+    def solver(self):
+        return self.program.solver
+
+    def run(self, code):
+        """Run code on top of everything run so far, rolling back to before it if it fails"""
+        solver = self.solver
+        # Clones share storage copy-on-write, so this costs nothing per symbol
+        saved = [branch.clone() for branch in solver.branches]
+        try:
+            self.program.run(code)
+        except BaseException:
+            solver.branches = saved
+            solver.index = {branch.fingerprint() for branch in saved}
+            raise
+
+
+class Server:
+    """
+    Answers JSON-lines requests with warm sessions, each request a line like
+    {"id": 1, "session": "a", "code": "A = (0, 0)", "reset": false} where
+    everything but code is optional. Code runs on top of the earlier code of
+    the same session, reset starts that session afresh first. Each response
+    is one line {"id", "ok", "output", "branches"}, with "error" when ok is false.
+    """
+    def __init__(self, **solver_options):
+        self.solver_options = solver_options
+        self.sessions = {}
+
+    def session(self, name, reset=False):
+        if reset or name not in self.sessions:
+            old = self.sessions.pop(name, None)
+            if old is not None:
+                old.solver.close()
+            self.sessions[name] = Session(**self.solver_options)
+        return self.sessions[name]
+
+    def handle(self, line):
+        """The response line for one request line"""
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict) or not isinstance(request.get('code', ''), str):
+                raise ValueError('a request is an object with a string "code"')
+        except ValueError as e:
+            return json.dumps({'id': None, 'ok': False, 'error': f'Bad request: {e}'})
+
+        response = {'id': request.get('id')}
+        session = self.session(str(request.get('session', 'default')), bool(request.get('reset')))
+        output = io.StringIO()
+        try:
+            with redirect_stdout(output):
+                session.run(request.get('code', ''))
+            response['ok'] = True
+        except Exception as e:
+            response['ok'] = False
+            response['error'] = f'{type(e).__name__}: {e}'
+        response['output'] = ANSI.sub('', output.getvalue())
+        response['branches'] = len(session.solver.branches)
+        return json.dumps(response)
+
+    def serve_stream(self, infile=sys.stdin, outfile=sys.stdout):
+        self.session('default')
+        for line in infile:
+            if line.strip():
+                outfile.write(self.handle(line) + '\n')
+                outfile.flush()
+
+    def serve_socket(self, host='127.0.0.1', port=DEFAULT_PORT):
+        """
+        Serve JSON-lines on a TCP socket. Connections are handled one at a
+        time in this thread, which keeps sessions consistent and lets solve
+        time limits use SIGALRM.
+        """
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    line = line.decode()
+                    if line.strip():
+                        self.wfile.write((server.handle(line) + '\n').encode())
+
+        self.session('default')
+        socketserver.TCPServer.allow_reuse_address = True
+        with socketserver.TCPServer((host, port), Handler) as listener:
+            print(f'Serving on {host}:{listener.server_address[1]}', file=sys.stderr)
+            listener.serve_forever()
+
+
+def repl(session=None, **solver_options):
+    """
+    Read statements one line at a time and run each on top of the last.
+    :reset starts over, :quit (or end of input) leaves.
+    """
+    try:
+        import readline  # noqa: F401, gives input() line editing and history
+    except ImportError:
+        pass
+    session = session or Session(**solver_options)
+    while True:
+        try:
+            line = input('ekl> ')
+        except EOFError:
+            print()
+            break
+        except KeyboardInterrupt:
+            print()
+            continue
+        command = line.strip()
+        if command == ':quit':
+            break
+        if command == ':reset':
+            session.solver.close()
+            session = Session(**solver_options)
+            continue
+        if not command:
+            continue
+        try:
+            session.run(line + '\n')
+        except KeyboardInterrupt:
+            print('Interrupted')
+        except Exception as e:
+            print(f'{type(e).__name__}: {e}')
+    session.solver.close()
@@ -0,0 +1,211 @@
+import json
+import sympy as sp
+from .geometry import Number, Point, Line, Angle, Circle, Collection
+from .solver import Solver, SolverBranch
+
+FORMAT = 1
+# Solver settings carried in a snapshot, the cache and pool stay with the process
+OPTIONS = ('incremental', 'numeric', 'lazy', 'max_branches', 'max_solve_time', 'max_total_time', 'on_limit')
+# Stored expressions were already evaluated, so rebuilding these without
+# evaluation gives the same expression without redoing the work
+UNEVALUATED = (sp.Add, sp.Mul, sp.Pow, sp.core.relational.Relational, sp.Function)
+_classes = None
+
+
+def sympy_classes():
+    """SymPy expression classes by name, the only things a snapshot can construct"""
+    global _classes
+    if _classes is None:
+        # ExprCondPair holds the pieces of a Piecewise and is not exported
+        from sympy.functions.elementary.piecewise import ExprCondPair
+        _classes = {
+            obj.__name__: obj for obj in [*vars(sp).values(), ExprCondPair]
+            if isinstance(obj, type) and issubclass(obj, sp.Basic)
+        }
+    return _classes
+
+
+class Encoder:
+    """
+    Flattens geometry objects and SymPy expressions into two tables where
+    every distinct expression and every object is stored once, children
+    referring to their parents' rows by index. Shared storage between
+    branches therefore costs nothing extra, and loading builds each
+    subexpression a single time.
+    """
+    def __init__(self):
+        self.exprs = []
+        self.expr_index = {}
+        self.objects = []
+        self.object_index = {}
+
+    def expr(self, expr):
+        index = self.expr_index.get(expr)
+        if index is not None:
+            return index
+        expr = sp.sympify(expr)
+        if isinstance(type(expr), sp.core.singleton.Singleton):
+            row = ['S', type(expr).__name__]
+        elif isinstance(expr, sp.Symbol):
+            row = ['Symbol', expr.name, expr.assumptions0]
+        elif isinstance(expr, sp.Integer):
+            row = ['Integer', int(expr)]
+        elif isinstance(expr, sp.Rational):
+            row = ['Rational', expr.p, expr.q]
+        elif isinstance(expr, sp.Float) and not expr:
+            # Float((0, 0, 0, 0)) comes back as Integer(0), zero goes as text
+            row = ['Float', '0.0', expr._prec]
+        elif isinstance(expr, sp.Float):
+            row = ['Float', list(expr._mpf_), expr._prec]
+        elif type(expr).__name__ in sympy_classes():
+            row = [type(expr).__name__, *map(self.expr, expr.args)]
+        else:
+            raise TypeError(f"Cannot snapshot expression of type {type(expr).__name__}: {expr}")
+        self.exprs.append(row)
+        index = self.expr_index[expr] = len(self.exprs) - 1
+        return index
+
+    def object(self, obj):
+        if obj is None:
+            return None
+        index = self.object_index.get(id(obj))
+        if index is not None:
+            return index
+        if isinstance(obj, Number):
+            row = ['Number', self.expr(obj.value)]
+        elif isinstance(obj, Point):
+            row = ['Point', self.object(obj.x), self.object(obj.y)]
+        elif isinstance(obj, (Line, Angle)):
+            row = [type(obj).__name__, self.objects_of(obj.points)]
+        elif isinstance(obj, Circle):
+            row = ['Circle', self.object(obj.center), self.object(obj.radius), self.objects_of(obj.points)]
+        elif isinstance(obj, Collection):
+            row = ['Collection', self.objects_of(obj.items)]
+        elif isinstance(obj, sp.Basic):
+            row = ['Expr', self.expr(obj)]
+        else:
+            raise TypeError(f"Cannot snapshot object of type {type(obj).__name__}: {obj}")
+        self.objects.append(row)
+        # Keyed by id, the solver being encoded keeps every obj alive meanwhile
+        index = self.object_index[id(obj)] = len(self.objects) - 1
+        return index
+
+    def objects_of(self, objs):
+        return None if objs is None else [self.object(obj) for obj in objs]
+
+    def branch(self, branch):
+        return {
+            'symbols': {name: self.object(obj) for name, obj in branch.symbols.items()},
+            'constraints': [self.expr(c) for c in branch.constraints],
+            'symbol_map': [[self.expr(sym), self.expr(val)] for sym, val in branch.symbol_map.items()],
+            'resolved': [self.expr(c) for c in branch.resolved],
+            'verified': [[self.expr(c), [self.expr(sym) for sym in syms]] for c, syms in branch.verified.items()],
+        }
+
+
+class Decoder:
+    """Rebuilds the tables an Encoder wrote, each row once and in order"""
+    def __init__(self, exprs, objects):
+        classes = sympy_classes()
+        self.exprs = []
+        for head, *args in exprs:
+            if head == 'S':
+                expr = getattr(sp.S, args[0])
+            elif head == 'Symbol':
+                expr = sp.Symbol(args[0], **args[1])
+            elif head == 'Integer':
+                expr = sp.Integer(args[0])
+            elif head == 'Rational':
+                expr = sp.Rational(args[0], args[1])
+            elif head == 'Float':
+                value = args[0] if isinstance(args[0], str) else tuple(args[0])
+                expr = sp.Float(value, precision=args[1])
+            elif head in classes:
+                cls = classes[head]
+                children = [self.exprs[i] for i in args]
+                expr = cls(*children, evaluate=False) if issubclass(cls, UNEVALUATED) else cls(*children)
+            else:
+                raise ValueError(f"Unknown expression type in snapshot: {head}")
+            self.exprs.append(expr)
+
+        self.objects = []
+        for head, *args in objects:
+            if head == 'Number':
+                obj = Number(self.exprs[args[0]])
+            elif head == 'Point':
+                obj = Point(self.object(args[0]), self.object(args[1]))
+            elif head == 'Line':
+                obj = Line(points=self.objects_of(args[0]))
+            elif head == 'Angle':
+                obj = Angle(points=self.objects_of(args[0]))
+            elif head == 'Circle':
+                obj = Circle(center=self.object(args[0]), radius=self.object(args[1]), points=self.objects_of(args[2]))
+            elif head == 'Collection':
+                obj = Collection(self.objects_of(args[0]))
+            elif head == 'Expr':
+                obj = self.exprs[args[0]]
+            else:
+                raise ValueError(f"Unknown object type in snapshot: {head}")
+            self.objects.append(obj)
+
+    def object(self, index):
+        return None if index is None else self.objects[index]
+
+    def objects_of(self, indices):
+        return None if indices is None else tuple(self.objects[i] for i in indices)
+
+    def branch(self, data, incremental=True, numeric=False, cache=None):
+        branch = SolverBranch(incremental=incremental, numeric=numeric, cache=cache)
+        branch.symbols = {name: self.objects[i] for name, i in data['symbols'].items()}
+        branch.constraints = [self.exprs[i] for i in data['constraints']]
+        branch.symbol_map = {self.exprs[sym]: self.exprs[val] for sym, val in data['symbol_map']}
+        branch.resolved = {self.exprs[i] for i in data['resolved']}
+        branch.verified = {self.exprs[c]: {self.exprs[sym] for sym in syms} for c, syms in data['verified']}
+        return branch
+
+
+def snapshot(solver):
+    """
+    Everything needed to rebuild solver as plain JSON data: its settings,
+    Number.unknownCount and the branches with their objects and expressions.
+    Nothing is executed on load besides constructing SymPy classes by name,
+    so snapshots are safe to pass between processes and machines.
+    """
+    encoder = Encoder()
+    branches = [encoder.branch(branch) for branch in solver.branches]
+    return {
+        'format': FORMAT,
+        'sympy': sp.__version__,
+        'options': {name: getattr(solver, name) for name in OPTIONS},
+        'unknownCount': Number.unknownCount,
+        'exprs': encoder.exprs,
+        'objects': encoder.objects,
+        'branches': branches,
+    }
+
+
+def restore_branches(data, incremental=True, numeric=False, cache=None):
+    """The branches of a snapshot, built with the given SolverBranch settings"""
+    if data.get('format') != FORMAT:
+        raise ValueError(f"Unsupported snapshot format {data.get('format')}, expected {FORMAT}")
+    # Later unknowns must not reuse the labels of ones in the snapshot
+    Number.unknownCount = max(Number.unknownCount, data['unknownCount'])
+    decoder = Decoder(data['exprs'], data['objects'])
+    return [decoder.branch(branch, incremental, numeric, cache) for branch in data['branches']]
+
+
+def restore(data, **solver_options):
+    """A new Solver in the state snapshot() recorded, solver_options override the saved settings"""
+    options = {**data['options'], **solver_options}
+    branches = restore_branches(
+        data, options.get('incremental', True), options.get('numeric', False), options.get('cache')
+    )
+    return Solver(branches=branches, **options)
+
+
+def dumps(solver):
+    return json.dumps(snapshot(solver), separators=(',', ':'))
+
+
+def loads(text, **solver_options):
+    return restore(json.loads(text), **solver_options)
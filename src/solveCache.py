@@ -0,0 +1,139 @@
+import ast
+import hashlib
+import os
+import sqlite3
+import time
+from functools import lru_cache
+import sympy as sp
+
+DEFAULT_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'eukleia', 'solutions.sqlite')
+
+
+# Stand-ins for the symbol being described and every other symbol, see canonicalize
+SELF, OTHER = sp.Symbol('@self'), sp.Symbol('@other')
+
+
+@lru_cache(maxsize=4096)
+def canonicalize(eqs, unknowns):
+    """
+    Relabel the symbols of a system by its structure alone and sort its
+    equations, so the same system built with different ?N labels (another
+    run, or elsewhere in this one) has the same canonical form.
+    Returns the key of that form, its equations and unknowns, and the map
+    from canonical symbols back to the originals.
+    """
+    symbols = set().union(*[eq.free_symbols for eq in eqs]) | set(unknowns)
+
+    def signature(sym):
+        # How sym appears in the system with every other symbol blanked out,
+        # which does not depend on what any of them are called
+        blank = {other: OTHER for other in symbols}
+        blank[sym] = SELF
+        return (
+            sym in unknowns,
+            sorted(sym.assumptions0.items()),
+            sorted(sp.srepr(eq.xreplace(blank)) for eq in eqs if sym in eq.free_symbols),
+        )
+
+    # Symbols that look alike break ties by where they first appear in the
+    # equations, themselves sorted with every symbol blanked out
+    blank = {sym: OTHER for sym in symbols}
+    ordered = sorted(eqs, key=lambda eq: sp.srepr(eq.xreplace(blank)))
+    first = {}
+    for eq in ordered:
+        for node in sp.preorder_traversal(eq):
+            if isinstance(node, sp.Symbol) and node in symbols:
+                first.setdefault(node, len(first))
+    symbols = sorted(symbols, key=lambda sym: (signature(sym), first.get(sym, len(first))))
+
+    # Padded so the labels sort as they are numbered, which is the order
+    # sp.solve goes by when it picks what to solve for
+    width = len(str(len(symbols)))
+    relabel = {sym: sp.Symbol(f'_{i:0{width}d}', **sym.assumptions0) for i, sym in enumerate(symbols)}
+    canonical_eqs = tuple(sorted((eq.xreplace(relabel) for eq in eqs), key=sp.srepr))
+    canonical_unknowns = tuple(sorted((relabel[sym] for sym in unknowns), key=sp.default_sort_key))
+    text = '\n'.join([
+        sp.__version__,
+        *map(sp.srepr, canonical_eqs),
+        '|'.join(map(sp.srepr, canonical_unknowns)),
+    ])
+    key = hashlib.sha256(text.encode()).hexdigest()
+    return key, canonical_eqs, canonical_unknowns, {canonical: sym for sym, canonical in relabel.items()}
+
+
+class SolveCache:
+    """
+    Persistent store of sp.solve results in a sqlite file, keyed by the
+    canonical form of the system and evicting least recently used entries
+    past max_entries. Entries are parsed back with sympify, so only point it
+    at files you trust.
+    """
+    def __init__(self, path=DEFAULT_PATH, max_entries=10000):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._connection = None
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._connection = sqlite3.connect(self.path)
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS solutions (key TEXT PRIMARY KEY, value TEXT, used REAL)'
+            )
+        return self._connection
+
+    def __getstate__(self):
+        # The connection cannot cross processes, each side reopens its own
+        state = dict(self.__dict__)
+        state['_connection'] = None
+        return state
+
+    def solve(self, key, eqs, unknowns, solve):
+        """solve(eqs, unknowns) for a system canonicalize() gave key, going through the cache"""
+        row = self.connection.execute('SELECT value FROM solutions WHERE key = ?', (key,)).fetchone()
+        if row is not None:
+            self.hits += 1
+            with self.connection:
+                self.connection.execute('UPDATE solutions SET used = ? WHERE key = ?', (time.time(), key))
+            return tuple(
+                tuple((sp.sympify(sym), sp.sympify(val)) for sym, val in sol)
+                for sol in ast.literal_eval(row[0])
+            )
+
+        self.misses += 1
+        sols = solve(eqs, unknowns)
+        entry = repr([[(sp.srepr(sym), sp.srepr(sp.sympify(val))) for sym, val in sol] for sol in sols])
+        with self.connection:
+            self.connection.execute('INSERT OR REPLACE INTO solutions VALUES (?, ?, ?)', (key, entry, time.time()))
+            self.evict()
+        return sols
+
+    def evict(self):
+        count = self.connection.execute('SELECT COUNT(*) FROM solutions').fetchone()[0]
+        if count > self.max_entries:
+            self.connection.execute(
+                'DELETE FROM solutions WHERE key IN (SELECT key FROM solutions ORDER BY used LIMIT ?)',
+                (count - self.max_entries,)
+            )
+            self.evictions += count - self.max_entries
+
+    def clear(self):
+        with self.connection:
+            self.connection.execute('DELETE FROM solutions')
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+
+    def merge(self, counts):
+        """Add counts, as returned by stats(), from a copy of this cache used in another process"""
+        for key, n in counts.items():
+            setattr(self, key, getattr(self, key) + n)
+
+    def __repr__(self):
+        return f"SolveCache({self.path}: {self.hits} hits, {self.misses} misses, {self.evictions} evictions)"
+
@@ -1,17 +1,407 @@
 import sympy as sp
 from .geometry import *
 import copy
+import math
+import time
+from functools import lru_cache
+from .budget import POLICIES, BudgetExceeded, SolveTimeout, time_limit
+from . import profiler
+from .solveCache import canonicalize
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+import io
+
+
+@lru_cache(maxsize=4096)
+def canonical_value(value):
+    """Normal form of a solved value, so equal values written differently compare equal"""
+    try:
+        profiler.count('simplify_calls')
+        value = sp.simplify(value)
+    except Exception:
+        pass
+    return sp.srepr(value)
+
+
+EVALUATION_DIGITS = 30
+BORDERLINE = 1e-20
+
+def screen_numerically(constraint, bindings):
+    """
+    First, cheap stage of checking a constraint: evaluate lhs - rhs to
+    EVALUATION_DIGITS digits. Returns whether it holds when the residual is
+    clearly away from zero, or None if it is symbolic or too close to zero to
+    tell, in which case exact simplification has to decide.
+    """
+    if not isinstance(constraint, (sp.Equality, sp.Unequality)):
+        return None
+    residual = (constraint.lhs - constraint.rhs).subs(list(bindings))
+    if residual.free_symbols:
+        return None
+    try:
+        magnitude = abs(complex(residual.evalf(EVALUATION_DIGITS)))
+    except (TypeError, ValueError):
+        return None
+    if math.isnan(magnitude) or magnitude <= BORDERLINE:
+        return None
+    return isinstance(constraint, sp.Unequality)
+
+
+VALIDITY_CACHE_SIZE = 2048
+
+@lru_cache(maxsize=VALIDITY_CACHE_SIZE)
+def check_constraint(constraint, bindings):
+    """
+    Simplify a constraint under the given (symbol, value) bindings.
+    Returns whether it can still hold, and the symbols it is left depending on
+    """
+    decided = screen_numerically(constraint, bindings)
+    if decided is not None:
+        return decided, frozenset()
+    try:
+        profiler.count('simplify_calls')
+        simplified = sp.simplify(constraint.subs(list(bindings)))
+    except Exception:
+        return True, frozenset(constraint.free_symbols)
+    if simplified == False:
+        return False, frozenset()
+    return True, frozenset(getattr(simplified, 'free_symbols', ()))
+
+
+NUMERIC_TOLERANCE = 1e-8
+
+def residual_holds(constraint, residual):
+    """Whether an Eq/Ne constraint holds given its fully numeric lhs - rhs"""
+    try:
+        is_zero = abs(complex(sp.N(residual))) <= NUMERIC_TOLERANCE
+    except TypeError:
+        return True
+    return is_zero if isinstance(constraint, sp.Equality) else not is_zero
+
+
+@lru_cache(maxsize=VALIDITY_CACHE_SIZE)
+def check_constraint_numeric(constraint, bindings):
+    """check_constraint for numeric mode, comparing residuals against NUMERIC_TOLERANCE"""
+    if not isinstance(constraint, (sp.Equality, sp.Unequality)):
+        return check_constraint(constraint, bindings)
+    residual = (constraint.lhs - constraint.rhs).subs(list(bindings))
+    if residual.free_symbols:
+        return True, frozenset(residual.free_symbols)
+    return residual_holds(constraint, residual), frozenset()
+
+
+def split_components(eqs, unknowns):
+    """
+    Partition eqs into independent subsystems, two equations being connected
+    whenever they share an unknown. Returns (eqs, unknowns) pairs in order of
+    first appearance, or None if some equation involves no unknown at all.
+    """
+    parent = {sym: sym for sym in unknowns}
+    def find(sym):
+        while parent[sym] != sym:
+            parent[sym] = parent[parent[sym]]
+            sym = parent[sym]
+        return sym
+
+    eq_syms = []
+    for eq in eqs:
+        syms = [sym for sym in unknowns if sym in eq.free_symbols]
+        if not syms:
+            return None
+        for sym in syms[1:]:
+            parent[find(sym)] = find(syms[0])
+        eq_syms.append(syms)
+
+    components = {}
+    for eq, syms in zip(eqs, eq_syms):
+        components.setdefault(find(syms[0]), []).append(eq)
+    return [
+        (component_eqs, [sym for sym in unknowns if find(sym) == root])
+        for root, component_eqs in components.items()
+    ]
+
+
+@lru_cache(maxsize=1024)
+@profiler.timed('solve')
+def solve_exact(eqs, unknowns):
+    sols = sp.solve(list(eqs), list(unknowns), dict=True)
+    return tuple(tuple(sol.items()) for sol in sols)
+
+
+def solve_component(eqs, unknowns, cache=None):
+    """
+    solve_exact, going through the SolveCache when there is one. The cache
+    stores the canonical form of the system, so ?N labels from another run
+    still hit; without a cache the system is solved as it stands, since
+    sp.solve is often slower on the relabelled one.
+    """
+    if cache is None:
+        return solve_exact(eqs, unknowns)
+    key, eqs, unknowns, restore = canonicalize(eqs, unknowns)
+    sols = cache.solve(key, eqs, unknowns, solve_exact)
+    return tuple(
+        tuple((sym.xreplace(restore), sp.sympify(val).xreplace(restore)) for sym, val in sol)
+        for sol in sols
+    )
+
+
+@profiler.timed('solve')
+def solve_component_numeric(eqs, unknowns):
+    from .numericSolver import solve_numeric
+    # Only fully determined, purely numeric subsystems can be root-found,
+    # anything else stays open until later constraints pin it down
+    if len(eqs) < len(unknowns) or any(not isinstance(eq, sp.Equality) for eq in eqs):
+        return ((),)
+    if any(eq.free_symbols - set(unknowns) for eq in eqs):
+        return ((),)
+    sols = solve_numeric(eqs, unknowns)
+    # Enough equations, but dependent ones: still underdetermined
+    if sols is None:
+        return ((),)
+    return tuple(tuple(sol.items()) for sol in sols)
+
+
+def solve_system(eqs, unknowns, numeric=False, cache=None):
+    """
+    sp.solve(eqs, unknowns, dict=True), but solving each independent subsystem
+    on its own (cached) and combining the results as a cross product.
+    With numeric set, subsystems are root-found with NumPy instead, otherwise
+    a SolveCache given as cache is consulted before calling sp.solve.
+    """
+    components = split_components(eqs, unknowns)
+    if components is None:
+        if numeric:
+            return []
+        return [dict(sol) for sol in solve_component(tuple(eqs), tuple(unknowns), cache)]
+
+    sols = [{}]
+    for component_eqs, component_unknowns in components:
+        if numeric:
+            component_sols = solve_component_numeric(tuple(component_eqs), tuple(component_unknowns))
+        else:
+            component_sols = solve_component(tuple(component_eqs), tuple(component_unknowns), cache)
+        sols = [{**sol, **dict(part)} for sol in sols for part in component_sols]
+        if not sols:
+            break
+    return sols
+
+
+def settle_in_worker(branch, timeout):
+    """
+    Worker process side of Solver.apply_constraints. Returns the settled
+    branches (None if it ran out of time), what settling printed, and the
+    hits and misses of the branch's SolveCache meanwhile, as neither the
+    output nor the counts would otherwise reach the parent process.
+    """
+    output = io.StringIO()
+    before = branch.cache.stats() if branch.cache is not None else {}
+    try:
+        with redirect_stdout(output), time_limit(timeout):
+            branches = branch.settle()
+    except SolveTimeout:
+        branches = None
+    after = branch.cache.stats() if branch.cache is not None else {}
+    return branches, output.getvalue(), {key: after[key] - before[key] for key in after}
+
+
 class Solver:
-    def __init__(self, branches=None):
-        self.branches = branches if branches else [SolverBranch()]
+    def __init__(self, branches=None, incremental=True, numeric=False, lazy=False, cache=None,
+                 max_branches=None, max_solve_time=None, max_total_time=None, on_limit='error',
+                 workers=None):
+        self.incremental = incremental
+        self.numeric = numeric
+        # Optional SolveCache persisting exact solutions between runs
+        self.cache = cache
+        # Lazy mode queues constraints and only solves them once a query needs them
+        self.lazy = lazy
+        self.branches = []
+        # Fingerprints of every branch in self.branches, for O(1) dedup
+        self.index = set()
+        self.add_branches(branches if branches else [SolverBranch(incremental=incremental, numeric=numeric, cache=cache)])
+
+        # Budget, times are in seconds and None means unlimited
+        if on_limit not in POLICIES:
+            raise ValueError(f"Unknown limit policy '{on_limit}', expected one of {', '.join(POLICIES)}")
+        self.max_branches = max_branches
+        self.max_solve_time = max_solve_time
+        self.max_total_time = max_total_time
+        self.on_limit = on_limit
+        self.started = None
+        # (limit, message) for every limit hit since the last take_limit_reports()
+        self.limit_reports = []
+
+        # Size of the process pool branches are solved in, None solves in process
+        self.workers = workers
+        self.pool = None
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def start_clock(self):
+        self.started = time.perf_counter()
+
+    def remaining_time(self):
+        if self.max_total_time is None or self.started is None:
+            return None
+        return self.max_total_time - (time.perf_counter() - self.started)
+
+    def limit_hit(self, limit, message, fatal=False):
+        self.limit_reports.append((limit, message))
+        if fatal or self.on_limit == 'error':
+            raise BudgetExceeded(limit, message)
+
+    def take_limit_reports(self):
+        reports, self.limit_reports = self.limit_reports, []
+        return reports
+
+    def apply_constraint(self, branch, left, op, right):
+        """
+        Add a constraint to one branch and replace it with the branches that
+        come out, enforcing the budget along the way. In lazy mode the
+        constraint is only queued on the branch, see settle().
+        """
+        description = f"{left} {op} {right}"
+        branch.add_constraint(left, op, right, solve=False)
+        if self.lazy:
+            return
+
+        new_branches = self.within_budget(description, branch.settle)
+        self.finish_constraint(branch, new_branches, description)
+
+    def apply_constraints(self, constraints):
+        """
+        apply_constraint for a list of (branch, left, op, right), one per live
+        branch. With workers, the branches are solved side by side in a
+        process pool and the results merged back in the same order, so the
+        outcome matches applying them one after another.
+        """
+        if not self.workers or self.lazy or len(constraints) < 2:
+            for constraint in constraints:
+                self.apply_constraint(*constraint)
+            return
+
+        timeout, limit = self.budget_timeout()
+        if timeout is not None and timeout <= 0:
+            for constraint in constraints:
+                self.apply_constraint(*constraint)
+            return
+
+        # Output is held back and written per branch, interleaved as a serial run prints it
+        queued = []
+        for branch, left, op, right in constraints:
+            output = io.StringIO()
+            with redirect_stdout(output):
+                branch.add_constraint(left, op, right, solve=False)
+            queued.append(output.getvalue())
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        results = self.pool.map(settle_in_worker, [branch for branch, *_ in constraints], [timeout] * len(constraints))
+
+        for (branch, left, op, right), before, (new_branches, output, counts) in zip(constraints, queued, results):
+            print(before + output, end='')
+            if self.cache is not None:
+                self.cache.merge(counts)
+                # Branches come back with their own copy of the cache
+                for new_branch in new_branches or ():
+                    new_branch.cache = self.cache
+            description = f"{left} {op} {right}"
+            if new_branches is None:
+                defer = self.on_limit == 'defer'
+                self.limit_hit(limit, f"{description} timed out after {timeout:.3g}s" + (", deferred" if defer else ""), fatal=not defer)
+            self.finish_constraint(branch, new_branches, description)
+
+    def finish_constraint(self, branch, new_branches, description):
+        # A branch the constraint rules out just goes, it is only impossible
+        # once no branch is left
+        self.replace_branch(branch, new_branches, description)
+        if not self.branches:
+            raise ValueError(
+                f'Impossible constraint: {description}\n'
+            )
+
+    def settle(self, branch, symbols):
+        """Lazy mode: solve the queued constraints on branch that symbols transitively depend on"""
+        description = f"solving for {', '.join(sorted(map(str, symbols)))}"
+        new_branches = self.within_budget(description, lambda: branch.settle(focus=symbols))
+        self.replace_branch(branch, new_branches, description)
+        if not self.branches:
+            raise ValueError(f'Impossible constraints when {description}')
+
+    def replace_branch(self, branch, new_branches, description):
+        """
+        Swap branch for the branches solving produced, None meaning it was
+        deferred and branch carries on with its constraints unsolved
+        """
+        if new_branches is None:
+            new_branches = [branch]
+
+        over = self.max_branches is not None and len(self.branches) - 1 + len(new_branches) > self.max_branches
+        if over and self.on_limit == 'defer' and not (len(new_branches) == 1 and new_branches[0] is branch):
+            self.limit_hit('max_branches', f"{description} would exceed {self.max_branches} branches, deferred")
+            new_branches = [branch]
+
+        self.remove_branch(branch)
+        self.add_branches(new_branches)
+        self.prune()
+
+        if self.max_branches is not None and len(self.branches) > self.max_branches and self.on_limit != 'defer':
+            self.limit_hit('max_branches', f"{len(self.branches)} branches, kept the best {self.max_branches}"
+                           if self.on_limit == 'beam' else f"{len(self.branches)} branches, limit is {self.max_branches}")
+            self.keep_best(self.max_branches)
+
+    def within_budget(self, description, solve):
+        """
+        Run solve() under max_solve_time and max_total_time. Running out of
+        time is an error unless the policy is 'defer', in which case None is
+        returned and the constraints are left unsolved for a later solve.
+        """
+        timeout, limit = self.budget_timeout()
+        defer = self.on_limit == 'defer'
+        if timeout is not None and timeout <= 0:
+            self.limit_hit(limit, f"no time left for {description}" + (", deferred" if defer else ""), fatal=not defer)
+            return None
+        try:
+            with time_limit(timeout):
+                return solve()
+        except SolveTimeout:
+            self.limit_hit(limit, f"{description} timed out after {timeout:.3g}s" + (", deferred" if defer else ""), fatal=not defer)
+            return None
+
+    def budget_timeout(self):
+        """Time the next solve may take and the limit that sets it"""
+        timeout, limit = self.max_solve_time, 'max_solve_time'
+        remaining = self.remaining_time()
+        if remaining is not None and (timeout is None or remaining < timeout):
+            timeout, limit = remaining, 'max_total_time'
+        return timeout, limit
+
+    def keep_best(self, k):
+        """Beam search step, keep the k best ranked branches in their current order"""
+        best = set(map(id, sorted(self.branches, key=lambda branch: branch.rank())[:k]))
+        self.branches = [branch for branch in self.branches if id(branch) in best]
+        self.index = {branch.fingerprint() for branch in self.branches}
     
     def add_branches(self, new_branches):
         for branch in new_branches:
-            if not any([branch == existing for existing in self.branches]):
+            fingerprint = branch.fingerprint()
+            if fingerprint not in self.index:
+                self.index.add(fingerprint)
                 self.branches.append(branch)
+            else:
+                profiler.count('branches_deduped')
+
+    def remove_branch(self, branch):
+        self.branches = [existing for existing in self.branches if existing is not branch]
+        self.index.discard(branch.fingerprint())
 
+    @profiler.timed('prune')
     def prune(self):
+        before = len(self.branches)
         self.branches = list(filter(lambda x: x.is_valid(), self.branches))
+        profiler.count('branches_pruned', before - len(self.branches))
+        self.index = {branch.fingerprint() for branch in self.branches}
 
     
 
@@ -19,16 +409,39 @@ class Solver:
 
 
 class SolverBranch:
-    def __init__(self):
+    def __init__(self, incremental=True, numeric=False, cache=None):
         self.symbols = {}
         self.constraints = []
         self.symbol_map = {}
         self.fullyDefined = False
+        # Incremental mode only hands sp.solve the constraints that are not
+        # already satisfied by symbol_map, rather than the whole system
+        self.incremental = incremental
+        # Numeric mode finds floating point roots with NumPy instead of sp.solve,
+        # it always solves incrementally as it needs constant coefficients
+        self.numeric = numeric
+        self.cache = cache
+        self.resolved = set()
+        # Constraint -> symbols it still depended on when it last passed is_valid
+        self.verified = {}
+        # Storage fields this branch may mutate in place, anything else is
+        # shared with a clone and gets copied on first write
+        self._owned = set(self.SHARED_FIELDS)
+        self._fingerprint = None
+
+    SHARED_FIELDS = ('symbols', 'constraints', 'symbol_map', 'resolved', 'verified')
+
+    def _writable(self, field):
+        if field not in self._owned:
+            setattr(self, field, copy.copy(getattr(self, field)))
+            self._owned.add(field)
+        return getattr(self, field)
         
     def add_object(self, name, obj):
-        self.symbols[name] = obj
+        self._writable('symbols')[name] = obj
         
-    def add_constraint(self, left, op, right):
+    @profiler.timed('add_constraint')
+    def add_constraint(self, left, op, right, solve=True):
         if op == '==':
             compareValue = {
                 Angle: 'cos',
@@ -37,13 +450,13 @@ class SolverBranch:
             }
             print(left, right)
             if isinstance(left, Angle):
-                self.constraints.append(sp.Eq(left.as_sympy(), right.as_sympy()))
+                self._writable('constraints').append(sp.Eq(left.as_sympy(), right.as_sympy()))
             else:
             # self.constraints.append(sp.Eq(left.cross(), sp.sqrt(left.dot()**2 + left.cross()**2)*sp.sin(right.as_sympy())))
             # if isinstance(left, Angle) and isinstance(right, Number):
             #     self.constraints.append(left == right)
             # else:
-                self.constraints.append(sp.Eq(getattr(left, compareValue[type(left)])(), (getattr(right, compareValue[type(right)])())))
+                self._writable('constraints').append(sp.Eq(getattr(left, compareValue[type(left)])(), (getattr(right, compareValue[type(right)])())))
 
         elif op[-2:] == 'on':
             if isinstance(left, Point) and isinstance(right, Line):
@@ -53,9 +466,9 @@ class SolverBranch:
                 Bx, By = B.x.as_sympy(), B.y.as_sympy()
                 expr = (Bx - Ax) * (Py - Ay) - (By - Ay) * (Px - Ax)
                 if op == 'NOT_on':
-                    self.constraints.append(sp.Ne(expr, 0))
+                    self._writable('constraints').append(sp.Ne(expr, 0))
                 else:
-                    self.constraints.append(sp.Eq(expr, 0))
+                    self._writable('constraints').append(sp.Eq(expr, 0))
             else:
                 raise ValueError("Currently unsupported 'on' between {left} and {right}")
         elif op == '//':
@@ -64,43 +477,95 @@ class SolverBranch:
             dirB_A = left.direction()
             dirD_C = right.direction()
             expr = dirB_A[0]*dirD_C[1] - dirB_A[1]*dirD_C[0]
-            self.constraints.append(sp.Eq(expr, 0))
+            self._writable('constraints').append(sp.Eq(expr, 0))
         
-        refined_branches = self.refine()
-        valid_branches = list(filter(lambda x: x.is_valid(), refined_branches))
+        if not solve:
+            return [self]
+
+        valid_branches = self.settle()
         if not valid_branches:
             raise ValueError(
                 f'Impossible constraint: {left} {op} {right}\n'
             )
         return valid_branches
+
+    def settle(self, focus=None):
+        """
+        Solve the constraints recorded so far and return the valid branches
+        that come out. With focus, only the constraints transitively sharing
+        unknowns with those symbols are solved, one at a time in the order they
+        were added, and the rest stay queued.
+        """
+        if focus is None:
+            refined_branches = self.refine()
+            return list(filter(lambda x: x.is_valid(), refined_branches))
+
+        relevant = self.relevant_constraints(focus)
+        branches = [self]
+        for i in range(len(relevant)):
+            only = set(relevant[:i + 1])
+            branches = [refined for branch in branches for refined in branch.refine(only) if refined.is_valid()]
+        return branches
+
+    def relevant_constraints(self, symbols):
+        """Unresolved constraints connected to symbols through shared unknowns"""
+        symbols = set(symbols)
+        pending = [(c, self.reduce(c).free_symbols) for c in self.constraints if c not in self.resolved]
+        relevant = set()
+        changed = True
+        while changed:
+            changed = False
+            for c, free in pending:
+                if c not in relevant and not free.isdisjoint(symbols):
+                    relevant.add(c)
+                    symbols |= free
+                    changed = True
+        return [c for c, _ in pending if c in relevant]
     
+    def rank(self):
+        """Sort key for beam search, more determined and simpler branches first"""
+        return (len(self.all_symbols()), sum(sp.count_ops(val) for val in self.symbol_map.values()))
+
+    def fingerprint(self):
+        """Hashable, order independent summary of symbol_map used to spot duplicate branches"""
+        if self._fingerprint is None:
+            self._fingerprint = tuple(sorted(
+                (str(sym), canonical_value(val)) for sym, val in self.symbol_map.items()
+            ))
+        return self._fingerprint
+
     def __eq__(self, other):
         if isinstance(other, SolverBranch):
-            return self.symbol_map == other.symbol_map
+            return self.fingerprint() == other.fingerprint()
         
     
-    def refine(self):
+    @profiler.timed('refine')
+    def refine(self, only=None):
 
         for c in self.constraints:
             if isinstance(c, sp.Or):
+                profiler.count('or_splits')
                 new_branches = []
                 for option in c.args:
                     branched = self.clone()
-                    branched.constraints.remove(c)
-                    branched.constraints.append(option)
-                    new_branches.extend(branched.refine())
+                    constraints = branched._writable('constraints')
+                    constraints.remove(c)
+                    constraints.append(option)
+                    new_branches.extend(branched.refine(None if only is None else only | {option}))
                 return new_branches
 
         new_branches = []
-        sols = self.solve()
-        # Normalise various SymPy return shapes
+        sols = self.solve(only)
+        # None means there was nothing left to solve, the branch carries on as it is
         if sols is None:
-            sols = []
-        elif isinstance(sols, dict):
+            new_branches.append(self.clone())
+            return new_branches
+        # Normalise various SymPy return shapes
+        if isinstance(sols, dict):
             sols = [sols]
 
+        # No solutions: the constraints contradict each other on this branch
         if not sols:
-            new_branches.append(self.clone())
             return new_branches
       
         # Branch for each solution
@@ -112,32 +577,101 @@ class SolverBranch:
         return new_branches
         
         
+    @profiler.timed('clone')
     def clone(self):
-        new_branch = SolverBranch()
-        new_branch.symbols = {name: copy.deepcopy(obj) for name, obj in self.symbols.items()}
-        new_branch.constraints = copy.deepcopy(self.constraints)
-        new_branch.symbol_map = copy.deepcopy(self.symbol_map)
+        # Geometry objects and SymPy expressions are never mutated, so the
+        # clone shares all storage and both sides copy on their next write
+        new_branch = SolverBranch(incremental=self.incremental, numeric=self.numeric, cache=self.cache)
+        for field in self.SHARED_FIELDS:
+            setattr(new_branch, field, getattr(self, field))
+        new_branch._owned = set()
+        new_branch._fingerprint = self._fingerprint
+        self._owned = set()
+        profiler.count('branches_created')
         return new_branch
     
-    def solve(self):
+    def solve(self, only=None):
         if not self.constraints:
             return {}
         
+        if self.incremental or self.numeric or only is not None:
+            return self.solve_incremental(only)
+
         eqs = []
         ineqs = []
         for c in self.constraints:
             if (isinstance(c, sp.Equality)): eqs.append(c)
             else: ineqs.append(c)
-        sols = sp.solve(eqs, self.all_symbols(), dict=True)
-        valid_sols = [sol for sol in sols if all([bool(ineq.subs(sol)) for ineq in ineqs])]
+        if not eqs:
+            return None
+        # The values this branch already settled on are what tell it apart
+        # from its siblings, so they are part of the system, and the symbols
+        # they bound are unknowns like any other rather than free parameters
+        eqs += [sp.Eq(sym, val) for sym, val in self.symbol_map.items()]
+        unknowns = sorted(set(self.all_symbols()).union(*[eq.free_symbols for eq in eqs]), key=sp.default_sort_key)
+        sols = solve_system(eqs, unknowns, cache=self.cache)
+        valid_sols = [sol for sol in sols if all([self.satisfies(ineq, sol) for ineq in ineqs])]
+        return valid_sols
+
+    def solve_incremental(self, only=None):
+        """
+        Solve only what is still open: every constraint not yet known to hold
+        has symbol_map substituted in, anything that reduces to True is marked
+        resolved, and the remainder is solved for the unresolved symbols only.
+        With only, constraints outside that set are left alone.
+        """
+        eqs = []
+        ineqs = []
+        for c in self.constraints:
+            if c in self.resolved or (only is not None and c not in only):
+                continue
+            reduced = self.reduce(c)
+            if reduced == True:
+                self._writable('resolved').add(c)
+            elif reduced == False:
+                return []
+            elif isinstance(c, sp.Equality): eqs.append(reduced)
+            else: ineqs.append(reduced)
+
+        if not eqs:
+            return None
+
+        free = set().union(*[eq.free_symbols for eq in eqs])
+        unknowns = [sym for sym in self.all_symbols() if sym in free]
+        if not unknowns:
+            return None
+        sols = solve_system(eqs, unknowns, numeric=self.numeric, cache=self.cache)
+        valid_sols = [sol for sol in sols if all([self.satisfies(ineq, sol) for ineq in ineqs])]
         return valid_sols
 
+    def satisfies(self, constraint, solution):
+        """Whether a constraint can still hold once solution is applied"""
+        check = check_constraint_numeric if self.numeric else check_constraint
+        return check(constraint, tuple(solution.items()))[0]
+
+    def reduce(self, constraint):
+        """
+        Substitute symbol_map into a constraint. In numeric mode a constraint
+        left with no unknowns is decided against NUMERIC_TOLERANCE instead,
+        as float roots rarely satisfy it exactly.
+        """
+        if not self.numeric or not isinstance(constraint, (sp.Equality, sp.Unequality)):
+            return constraint.subs(self.symbol_map)
+        residual = (constraint.lhs - constraint.rhs).subs(self.symbol_map)
+        if residual.free_symbols:
+            return type(constraint)(residual, 0)
+        return sp.true if residual_holds(constraint, residual) else sp.false
+
     def apply_solution(self, solution):
-        # Needs optimizing
-        for obj in self.symbols.values():
-            obj.substitute(solution)
+        # One memo for the whole pass, so objects shared between symbols
+        # (points of lines and angles) are substituted once and stay shared
+        memo = {}
+        self.symbols = {name: obj.substitute(solution, memo) for name, obj in self.symbols.items()}
+        self._owned.add('symbols')
+        symbol_map = self._writable('symbol_map')
         for sym, val in solution.items():
-            self.symbol_map[sym] = val
+            symbol_map[sym] = val
+        self._fingerprint = None
         
 
                     
@@ -145,31 +679,45 @@ class SolverBranch:
         syms = set()
         for obj in self.symbols.values():
             syms |= obj.symbols()
-        return list(syms)
+        # In a fixed order, sp.solve picks which symbols to solve for by it
+        return sorted(syms, key=sp.default_sort_key)
     
+    @profiler.timed('is_valid')
     def is_valid(self):
-        constraints = copy.deepcopy(self.constraints)
-
         eqs = []
         ineqs = []
-        for c in constraints:
+        for c in self.constraints:
             if (isinstance(c, sp.Equality)): eqs.append(c)
             else: ineqs.append(c)
 
-        for eq in eqs:
-            try:
-                simplified = sp.simplify(eq.subs(self.symbol_map))
-                
-                if simplified == False: return False
-            except Exception:
-                continue
-
-        for ineq in ineqs:
-            try: 
-                simplified = sp.simplify(ineq.subs(self.symbol_map))
-                if simplified == False: return False
-            except Exception:
-                continue
+        for c in eqs + ineqs:
+            if not self.check(c): return False
                 
         return True
+
+    def check(self, constraint):
+        if constraint in self.resolved:
+            return True
+        # Nothing it depended on has been bound since it last passed
+        depends_on = self.verified.get(constraint)
+        if depends_on is not None and depends_on.isdisjoint(self.symbol_map):
+            return True
+
+        check = check_constraint_numeric if self.numeric else check_constraint
+        holds, depends_on = check(constraint, self.relevant_bindings(constraint))
+        if holds:
+            self._writable('verified')[constraint] = depends_on
+        return holds
+
+    def relevant_bindings(self, constraint):
+        """The slice of symbol_map that substituting into constraint can reach"""
+        needed = set(constraint.free_symbols)
+        frontier = list(needed)
+        while frontier:
+            sym = frontier.pop()
+            if sym in self.symbol_map:
+                for inner in self.symbol_map[sym].free_symbols - needed:
+                    needed.add(inner)
+                    frontier.append(inner)
+        return tuple((sym, val) for sym, val in self.symbol_map.items() if sym in needed)
     
\ No newline at end of file
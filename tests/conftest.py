@@ -0,0 +1,41 @@
+import glob
+import io
+import os
+import re
+import sys
+from contextlib import redirect_stdout
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+CORPUS = sorted(glob.glob(os.path.join(ROOT, 'bench', 'corpus', '*.ekl')))
+ANSI = re.compile(r'\033\[[0-9;]*m')
+
+
+def corpus(test):
+    """Parametrize test over the programs in bench/corpus, by name"""
+    return pytest.mark.parametrize('path', CORPUS, ids=[os.path.splitext(os.path.basename(path))[0] for path in CORPUS])(test)
+
+
+def run_program(code, first_unknown=0, **solver_options):
+    """
+    Run code in a fresh Eukleia with unknowns numbered from first_unknown,
+    returning the program and what it printed without colour codes
+    """
+    from src.eukleia import Eukleia
+    from src.geometry import Number
+
+    Number.unknownCount = first_unknown
+    program = Eukleia(**solver_options)
+    output = io.StringIO()
+    with redirect_stdout(output):
+        program.run(code)
+    program.solver.close()
+    return program, ANSI.sub('', output.getvalue())
+
+
+def read(path):
+    with open(path) as f:
+        return f.read()
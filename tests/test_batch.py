@@ -0,0 +1,18 @@
+import os
+import shutil
+
+from conftest import ROOT
+from src.batch import run_job
+
+
+def test_run_job_leaves_no_cache_behind(tmp_path):
+    shutil.copy(os.path.join(ROOT, 'bench', 'corpus', 'easy_chain.ekl'), tmp_path)
+    result = run_job(str(tmp_path / 'easy_chain.ekl'))
+    assert result['status'] == 'ok'
+    assert os.listdir(tmp_path) == ['easy_chain.ekl']
+
+
+def test_run_job_times_out(tmp_path):
+    result = run_job(os.path.join(ROOT, 'bench', 'corpus', 'hard_branching.ekl'), timeout=0.05)
+    assert result['status'] == 'timeout'
+    assert result['error'] == 'Timed out after 0.05s'
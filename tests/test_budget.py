@@ -0,0 +1,57 @@
+import time
+
+import pytest
+from conftest import run_program
+
+from src.budget import BudgetExceeded, SolveTimeout, time_limit
+
+
+class OuterTimeout(BaseException):
+    pass
+
+
+def spin(seconds):
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        pass
+
+
+def test_inner_limit_raises_its_own_error():
+    with pytest.raises(SolveTimeout):
+        with time_limit(5, OuterTimeout):
+            with time_limit(0.05):
+                spin(1)
+
+
+def test_outer_deadline_inside_inner_limit_raises_outer_error():
+    # Code handling the inner limit, like Solver.within_budget, must not see the outer one
+    handled = []
+    with pytest.raises(OuterTimeout):
+        with time_limit(0.05, OuterTimeout):
+            try:
+                with time_limit(5):
+                    spin(1)
+            except SolveTimeout:
+                handled.append(True)
+    assert not handled
+
+
+def test_outer_limit_keeps_counting_after_inner_one():
+    started = time.monotonic()
+    with pytest.raises(OuterTimeout):
+        with time_limit(0.2, OuterTimeout):
+            with time_limit(5):
+                spin(0.1)
+            spin(1)
+    assert time.monotonic() - started < 0.5
+
+
+def test_limits_are_disarmed_on_exit():
+    with time_limit(0.05):
+        pass
+    spin(0.1)
+
+
+def test_solve_time_limit_reported():
+    with pytest.raises(BudgetExceeded, match='max_solve_time'):
+        run_program('A = (0, 0)\nB = (?, ?)\nC = (?, ?)\nAB == 3\nBC == 4\nAC == 5\n', max_solve_time=1e-4)
@@ -0,0 +1,55 @@
+import io
+import os
+import shutil
+from contextlib import redirect_stdout
+
+from conftest import ANSI, ROOT, read, run_program
+from src import checkpoints
+from src.eukleia import Eukleia
+from src.geometry import Number
+
+PROGRAM = os.path.join(ROOT, 'bench', 'corpus', 'hard_circles.ekl')
+
+
+def run_file(path, monkeypatch):
+    """Run path with checkpoints in a fresh Eukleia, returning its output and how many statements were replayed"""
+    replayed = []
+    replay = checkpoints.Checkpoints.replay
+
+    def counted(self, key):
+        output = replay(self, key)
+        replayed.append(output is not None)
+        return output
+
+    monkeypatch.setattr(checkpoints.Checkpoints, 'replay', counted)
+    Number.unknownCount = 0
+    program = Eukleia()
+    output = io.StringIO()
+    with redirect_stdout(output):
+        program.run_file(path, checkpoint=True)
+    program.solver.close()
+    return ANSI.sub('', output.getvalue()), sum(replayed)
+
+
+def test_rerun_replays_every_statement(tmp_path, monkeypatch):
+    path = shutil.copy(PROGRAM, tmp_path)
+    first, replayed = run_file(path, monkeypatch)
+    assert replayed == 0
+    second, replayed = run_file(path, monkeypatch)
+    assert second == first
+    assert replayed == len([line for line in read(path).splitlines() if line and not line.startswith('#')])
+
+
+def test_edit_resumes_from_first_change(tmp_path, monkeypatch):
+    path = shutil.copy(PROGRAM, tmp_path)
+    run_file(path, monkeypatch)
+    code = read(path)
+    edited = code.replace('BD == 4', 'BD == 3')
+    with open(path, 'w') as f:
+        f.write(edited)
+    output, replayed = run_file(path, monkeypatch)
+    _, expected = run_program(edited)
+    assert output == expected
+    # Everything before BD == 4 is replayed, that statement and the rest run
+    statements = [line for line in code.splitlines() if line and not line.startswith('#')]
+    assert replayed == statements.index('BD == 4')
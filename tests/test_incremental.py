@@ -0,0 +1,20 @@
+import pytest
+from conftest import corpus, read, run_program
+
+
+@corpus
+def test_incremental_matches_full_solve(path):
+    _, incremental = run_program(read(path), incremental=True)
+    _, full = run_program(read(path), incremental=False)
+    assert incremental == full
+
+
+def test_inconsistent_branch_is_dropped():
+    # The first distance leaves C = (+-sqrt(9 - ?1**2), ?1), the second rules out the negative root
+    program, _ = run_program('A = (0, 0)\nB = (4, 0)\nC = (?, ?)\nAC == 3\nBC == 3\n')
+    assert sorted(str(branch.symbols['C']) for branch in program.solver.branches) == ['(2, -sqrt(5))', '(2, sqrt(5))']
+
+
+def test_impossible_only_once_no_branch_is_left():
+    with pytest.raises(ValueError, match='Impossible constraint'):
+        run_program('A = (0, 0)\nB = (1, 0)\nAB == 2\n')
@@ -0,0 +1,41 @@
+import io
+
+import pytest
+
+from conftest import corpus, read
+from src.lexer import Lexer
+
+
+def lex(source):
+    return [(token.type.name, token.value) for token in Lexer().iter_tokens(source)]
+
+
+@pytest.mark.parametrize('code, expected', [
+    ('AB == 3', [('OBJECT', 'A'), ('OBJECT', 'B'), ('EQUALS_DOUBLE', '=='), ('NUMBER', 3.0)]),
+    ('A = (?, ?)', [('OBJECT', 'A'), ('EQUALS_SINGLE', '='), ('LPAREN', '('), ('QUESTION', '?'),
+                    ('COMMA', ','), ('QUESTION', '?'), ('RPAREN', ')')]),
+    ('AB // CD', [('OBJECT', 'A'), ('OBJECT', 'B'), ('PARALLEL', '//'), ('OBJECT', 'C'), ('OBJECT', 'D')]),
+    ('<ABC == 30d', [('ANGLE', '<'), ('OBJECT', 'A'), ('OBJECT', 'B'), ('OBJECT', 'C'),
+                     ('EQUALS_DOUBLE', '=='), ('NUMBER', 30.0), ('DEG', 'd')]),
+    ('LineAB', [('KEYWORD', 'Line'), ('OBJECT', 'A'), ('OBJECT', 'B')]),
+    ('x_1 = 1.5 + .5', [('IDENTIFIER', 'x_1'), ('EQUALS_SINGLE', '='), ('NUMBER', 1.5), ('PLUS', '+'), ('NUMBER', 0.5)]),
+    ('P on AB and not Q', [('OBJECT', 'P'), ('ON', 'on'), ('OBJECT', 'A'), ('OBJECT', 'B'),
+                           ('AND', 'and'), ('NOT', 'not'), ('OBJECT', 'Q')]),
+    # A run of one character is one token only if it spells one
+    ('??', [('QUESTION', '?'), ('QUESTION', '?')]),
+    ('...', [('ELLIPSIS', '...')]),
+    ('===', [('EQUALS_SINGLE', '=')] * 3),
+])
+def test_tokens(code, expected):
+    assert lex(code + '\n') == expected + [('NEWLINE', None), ('EOF', None)]
+
+
+def test_unexpected_character():
+    with pytest.raises(Exception, match='Unexpected character: \\$'):
+        lex('A = $\n')
+
+
+@corpus
+def test_streaming_matches_whole_text(path):
+    code = read(path)
+    assert lex(io.StringIO(code)) == lex(code)
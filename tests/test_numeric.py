@@ -0,0 +1,30 @@
+import sympy as sp
+from conftest import read, run_program, CORPUS
+
+from src.numericSolver import solve_numeric
+
+x, y = sp.symbols('x y')
+
+
+def roots(sols):
+    return sorted(tuple(float(value) for value in sol.values()) for sol in sols)
+
+
+def test_regular_roots_around_another_root_are_kept():
+    assert roots(solve_numeric([sp.Eq(x**3 - x, 0)], [x])) == [(-1.0,), (0.0,), (1.0,)]
+
+
+def test_tangential_root_is_one_root():
+    assert roots(solve_numeric([sp.Eq(sp.sqrt(1 + y**2), 1)], [y])) == [(0.0,)]
+    assert roots(solve_numeric([sp.Eq(x**2 + y**2, 1), sp.Eq(x, 1)], [x, y])) == [(1.0, 0.0)]
+
+
+def test_dependent_equations_are_not_sampled():
+    assert solve_numeric([sp.Eq(x + y, 1), sp.Eq(2*x + 2*y, 2)], [x, y]) is None
+
+
+def test_chain_of_tangential_roots_does_not_branch():
+    path = next(path for path in CORPUS if path.endswith('easy_chain.ekl'))
+    program, _ = run_program(read(path), numeric=True)
+    assert len(program.solver.branches) == 1
+    assert str(program.solver.branches[0].symbols['Z']) == '(25, 0.0)'
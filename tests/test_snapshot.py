@@ -0,0 +1,39 @@
+import pytest
+import sympy as sp
+
+from conftest import corpus, read, run_program
+from src import snapshot
+
+x = sp.Symbol('x', real=True)
+
+
+@corpus
+@pytest.mark.parametrize('numeric', [False, True], ids=['exact', 'numeric'])
+def test_solver_round_trips(path, numeric):
+    program, _ = run_program(read(path), numeric=numeric)
+    solver = program.solver
+    restored = snapshot.loads(snapshot.dumps(solver))
+    assert len(restored.branches) == len(solver.branches)
+    for branch, other in zip(solver.branches, restored.branches):
+        assert branch.fingerprint() == other.fingerprint()
+        # Printed too, 0.0 and 0 are easy to miss otherwise
+        assert branch.symbol_map == other.symbol_map
+        assert str(branch.symbol_map) == str(other.symbol_map)
+        assert repr(branch.symbols) == repr(other.symbols)
+
+
+@pytest.mark.parametrize('expr', [
+    sp.Piecewise((x, x > 0), (0, True)),
+    sp.CRootOf(x**5 - x + 1, 0),
+    sp.Ne(x, 1),
+    sp.Min(x, 1),
+    sp.atan2(x, 1) + sp.sqrt(2) / 3,
+    sp.Float(0.0),
+    sp.Float(-2.5),
+], ids=str)
+def test_expression_round_trips(expr):
+    encoder = snapshot.Encoder()
+    index = encoder.expr(expr)
+    restored = snapshot.Decoder(encoder.exprs, []).exprs[index]
+    assert restored == expr
+    assert str(restored) == str(expr)
@@ -0,0 +1,41 @@
+import sympy as sp
+from conftest import corpus, read, run_program
+
+from src.solveCache import SolveCache, canonicalize
+
+
+def system(a, b):
+    x, y = sp.Symbol(f'?{a}', real=True), sp.Symbol(f'?{b}', real=True)
+    return (sp.Eq(x + 2*y, 1), sp.Eq(x**2 + y**2, 25)), (x, y)
+
+
+def test_key_ignores_unknown_numbering():
+    # ?9 and ?10 sort the other way round by name than ?3 and ?4
+    keys = {canonicalize(*system(a, b))[0] for a, b in [(3, 4), (9, 10), (10, 9), (99, 100)]}
+    assert len(keys) == 1
+
+
+def test_canonical_form_maps_back():
+    eqs, unknowns = system(9, 10)
+    _, canonical_eqs, canonical_unknowns, restore = canonicalize(eqs, unknowns)
+    assert {eq.xreplace(restore) for eq in canonical_eqs} == set(eqs)
+    assert {sym.xreplace(restore) for sym in canonical_unknowns} == set(unknowns)
+
+
+def test_hits_with_shifted_unknowns(tmp_path):
+    code = 'A = (0, 0)\nB = (4, 0)\nC = (?, ?)\nAC == 3\nBC == 3\n'
+    run_program(code, cache=SolveCache(str(tmp_path / 'solutions.sqlite')))
+    cache = SolveCache(str(tmp_path / 'solutions.sqlite'))
+    _, output = run_program(code, first_unknown=57, cache=cache)
+    assert cache.misses == 0 and cache.hits > 0
+    assert output == run_program(code, first_unknown=57)[1]
+
+
+@corpus
+def test_cached_output_matches_uncached(path, tmp_path):
+    _, uncached = run_program(read(path))
+    store = str(tmp_path / 'solutions.sqlite')
+    _, cold = run_program(read(path), cache=SolveCache(store))
+    _, warm = run_program(read(path), cache=SolveCache(store))
+    assert cold == uncached
+    assert warm == uncached